@@ -19,7 +19,15 @@ def create_app(test_config=None):
     # Configure the app
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
-        DEBUG=os.environ.get('FLASK_ENV', 'development') == 'development'
+        DEBUG=os.environ.get('FLASK_ENV', 'development') == 'development',
+        # Micro-batching of model inference across clients
+        INFERENCE_BATCHING=os.environ.get('INFERENCE_BATCHING', '1') == '1',
+        INFERENCE_BATCH_MAX_ROWS=int(os.environ.get('INFERENCE_BATCH_MAX_ROWS', 256)),
+        INFERENCE_BATCH_WAIT_MS=float(os.environ.get('INFERENCE_BATCH_WAIT_MS', 2.0)),
+        # Serve the memory-mapped model bundle when one is available
+        MODEL_MMAP=os.environ.get('MODEL_MMAP', '0') == '1',
+        # Load the model and run a dummy prediction in the background at startup
+        WARM_UP=os.environ.get('WARM_UP', '1') == '1'
     )
     
     if test_config is None:
@@ -45,6 +53,10 @@ def create_app(test_config=None):
     def docs():
         return redirect('/api/docs')
     
+    # The registry loads models on first use, so this applies to the controllers' data processors
+    from app.model.model_registry import model_registry
+    model_registry.prefer_mapped = app.config['MODEL_MMAP']
+    
     # Register blueprints
     from app.view.api_routes import api_routes
     from app.controller.trip_controller import trip_controller
@@ -52,6 +64,12 @@ def create_app(test_config=None):
     app.register_blueprint(api_routes, url_prefix='/api')
     app.register_blueprint(trip_controller, url_prefix='/api')
     
+    # REST and WebSocket clients share one data processor, so their predictions can be batched
+    if app.config['INFERENCE_BATCHING']:
+        from app.controller.trip_controller import data_processor
+        data_processor.enable_inference_batching(app.config['INFERENCE_BATCH_MAX_ROWS'],
+                                                 app.config['INFERENCE_BATCH_WAIT_MS'])
+    
     # Initialize SocketIO with the app
     socketio.init_app(app, cors_allowed_origins="*")
     
@@ -59,4 +77,10 @@ def create_app(test_config=None):
     from app.controller.websocket_controller import init_socketio
     init_socketio(socketio)
     
+    # The model is loaded on first use; warm it up before the first request
+    if app.config['WARM_UP'] and not app.config.get('TESTING'):
+        from app.controller.trip_controller import data_processor
+        from app.utils.startup import start_warm_up
+        start_warm_up(data_processor)
+    
     return app
@@ -1,28 +1,48 @@
 from flask import jsonify, request, Blueprint
-import pandas as pd
 import numpy as np
 import uuid
 import json
+import threading
 import time
 from typing import Dict, List, Any, Optional
 
 from app.model.data_processor import DataProcessor
 from app.model.scoring_system import ScoringSystem
 from app.model.ml_model import DriverBehaviorModel
+from app.model.realtime_extractor import RealtimeFeatureExtractor
+from app.model.sensor_batch import SensorBatch
+from app.model.window_cache import WindowCache
 
 # In-memory storage for trips
 trips = {}
 active_trips = {}
 
+# Per-trip real-time feature extractors for active trips
+realtime_extractors = {}
+_extractors_lock = threading.Lock()
+
 trip_controller = Blueprint('trip_controller', __name__)
 
 # Initialize models
 data_processor = DataProcessor()
 scoring_system = ScoringSystem()
-ml_model = DriverBehaviorModel()
+ml_model = DriverBehaviorModel()  # Loads the model for evaluation on first use
+
+def _serialize_trip(trip: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a trip record with its sample store converted to a list of dicts for JSON."""
+    return {**trip, 'data': trip['data'].to_records()}
+
+def _get_realtime_extractor(trip_id: str) -> RealtimeFeatureExtractor:
+    """Return the real-time extractor of an active trip, creating it if needed."""
+    with _extractors_lock:
+        if trip_id not in realtime_extractors:
+            realtime_extractors[trip_id] = RealtimeFeatureExtractor(data_processor)
+        return realtime_extractors[trip_id]
 
-# Try to load the model if it exists
-ml_model.load()
+def _get_window_cache(trip_id: str) -> Optional[WindowCache]:
+    """Return the cached real-time window results of an active trip, if any."""
+    extractor = realtime_extractors.get(trip_id)
+    return extractor.window_cache if extractor is not None else None
 
 @trip_controller.route('/trips', methods=['POST'])
 def start_trip():
@@ -41,7 +61,7 @@ def start_trip():
             'start_location': data.get('start_location', {}),
             'end_location': None,
             'status': 'active',
-            'data': [],
+            'data': SensorBatch(),  # Columnar, append-only sample store
             'events': {
                 'harsh_acceleration': [],
                 'harsh_braking': [],
@@ -87,10 +107,10 @@ def end_trip(trip_id):
         
         # Process all trip data
         if active_trips[trip_id]['data']:
-            trip_data = pd.DataFrame(active_trips[trip_id]['data'])
+            trip_data = active_trips[trip_id]['data'][:]
             
-            # Process the trip data
-            analysis = data_processor.process_trip_data(trip_data)
+            # Process the trip data, reusing the windows analysed in real time
+            analysis = data_processor.process_trip_data(trip_data, cache=_get_window_cache(trip_id))
             
             # Update trip with analysis results
             active_trips[trip_id]['scores'] = analysis['scores']
@@ -105,11 +125,12 @@ def end_trip(trip_id):
         # Move from active to completed trips
         trips[trip_id] = active_trips[trip_id]
         del active_trips[trip_id]
+        realtime_extractors.pop(trip_id, None)
         
         return jsonify({
             'status': 'success',
             'message': 'Trip ended successfully',
-            'trip': trips[trip_id]
+            'trip': _serialize_trip(trips[trip_id])
         }), 200
     
     except Exception as e:
@@ -139,16 +160,15 @@ def add_trip_data(trip_id):
                     'message': f'Missing required field: {field}'
                 }), 400
         
-        # Add data to trip
-        active_trips[trip_id]['data'].append(data)
-        
-        # Process the latest data chunk for real-time feedback
-        # Use the last 100 data points or all if less than 100
-        data_chunk = active_trips[trip_id]['data'][-100:]
-        data_df = pd.DataFrame(data_chunk)
-        
-        # Get real-time analysis
-        realtime_analysis = data_processor.process_realtime_data(data_df)
+        # Add data to trip, keeping only the sensor axes and timestamp; the
+        # extractor's lock keeps concurrent requests in the same order in both
+        samples = SensorBatch.from_records([data])
+        extractor = _get_realtime_extractor(trip_id)
+        with extractor.lock:
+            active_trips[trip_id]['data'].append(samples)
+            
+            # Get real-time analysis for the windows completed by the new data point
+            realtime_analysis = data_processor.process_realtime_data(samples, extractor=extractor)
         
         return jsonify({
             'status': 'success',
@@ -190,16 +210,15 @@ def add_trip_data_batch(trip_id):
                         'message': f'Missing required field: {field} in data point'
                     }), 400
         
-        # Add data to trip
-        active_trips[trip_id]['data'].extend(data_batch)
-        
-        # Process the latest data chunk for real-time feedback
-        # Use the last 100 data points or all if less than 100
-        data_chunk = active_trips[trip_id]['data'][-100:]
-        data_df = pd.DataFrame(data_chunk)
-        
-        # Get real-time analysis
-        realtime_analysis = data_processor.process_realtime_data(data_df)
+        # Add data to trip, keeping only the sensor axes and timestamp; the
+        # extractor's lock keeps concurrent requests in the same order in both
+        samples = SensorBatch.from_records(data_batch)
+        extractor = _get_realtime_extractor(trip_id)
+        with extractor.lock:
+            active_trips[trip_id]['data'].append(samples)
+            
+            # Get real-time analysis for the windows completed by the new batch
+            realtime_analysis = data_processor.process_realtime_data(samples, extractor=extractor)
         
         return jsonify({
             'status': 'success',
@@ -221,14 +240,14 @@ def get_trip(trip_id):
         if trip_id in active_trips:
             return jsonify({
                 'status': 'success',
-                'trip': active_trips[trip_id]
+                'trip': _serialize_trip(active_trips[trip_id])
             }), 200
         
         # Then check completed trips
         if trip_id in trips:
             return jsonify({
                 'status': 'success',
-                'trip': trips[trip_id]
+                'trip': _serialize_trip(trips[trip_id])
             }), 200
         
         return jsonify({
@@ -249,7 +268,7 @@ def get_all_trips():
         all_trips = {**trips, **active_trips}
         
         # Convert to list and sort by start time (newest first)
-        trip_list = list(all_trips.values())
+        trip_list = [_serialize_trip(trip) for trip in all_trips.values()]
         trip_list.sort(key=lambda x: x['start_time'], reverse=True)
         
         return jsonify({
@@ -272,8 +291,11 @@ def get_trip_scores(trip_id):
             if active_trips[trip_id]['scores'] is None:
                 # Calculate preliminary scores based on current data
                 if active_trips[trip_id]['data']:
-                    trip_data = pd.DataFrame(active_trips[trip_id]['data'])
-                    analysis = data_processor.process_trip_data(trip_data)
+                    # A view of the samples received so far; later appends don't change it
+                    trip_data = active_trips[trip_id]['data'][:]
+                    
+                    # Served from the running aggregates of the real-time path when they cover the data
+                    analysis = data_processor.provisional_trip_analysis(trip_data, realtime_extractors.get(trip_id))
                     return jsonify({
                         'status': 'success',
                         'trip_id': trip_id,
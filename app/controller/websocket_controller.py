@@ -1,15 +1,15 @@
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask import request, current_app
-import pandas as pd
 import json
 import time
 import threading
 from typing import Dict, Any
 
-from app.model.data_processor import DataProcessor
+from app.model.realtime_extractor import RealtimeFeatureExtractor
+from app.model.sensor_batch import SensorBatch
 
-# Initialize data processor
-data_processor = DataProcessor()
+# Share the REST controller's data processor, and with it its model and inference batcher
+from app.controller.trip_controller import data_processor
 
 # In-memory storage for active WebSocket connections
 active_connections = {}
@@ -24,7 +24,10 @@ def init_socketio(socketio: SocketIO):
         active_connections[client_id] = {
             'trip_id': None,
             'last_update': time.time(),
-            'data_buffer': []
+            'data_buffer': SensorBatch(),
+            'extractor': None,
+            # Guards the buffer and extractor against the background task
+            'lock': threading.RLock()
         }
         emit('connection_status', {'status': 'connected', 'client_id': client_id})
     
@@ -53,8 +56,10 @@ def init_socketio(socketio: SocketIO):
         
         # Update client's trip association
         if client_id in active_connections:
-            active_connections[client_id]['trip_id'] = trip_id
-            active_connections[client_id]['last_update'] = time.time()
+            with active_connections[client_id]['lock']:
+                active_connections[client_id]['trip_id'] = trip_id
+                active_connections[client_id]['last_update'] = time.time()
+                active_connections[client_id]['extractor'] = RealtimeFeatureExtractor(data_processor)
             
             # Join the trip room
             join_room(f'trip_{trip_id}')
@@ -76,7 +81,9 @@ def init_socketio(socketio: SocketIO):
         
         # Update client's trip association
         if client_id in active_connections and active_connections[client_id]['trip_id'] == trip_id:
-            active_connections[client_id]['trip_id'] = None
+            with active_connections[client_id]['lock']:
+                active_connections[client_id]['trip_id'] = None
+                active_connections[client_id]['extractor'] = None
             
             # Leave the trip room
             leave_room(f'trip_{trip_id}')
@@ -109,8 +116,9 @@ def init_socketio(socketio: SocketIO):
                 return
         
         # Add data to buffer
-        active_connections[client_id]['data_buffer'].append(data)
-        active_connections[client_id]['last_update'] = time.time()
+        with active_connections[client_id]['lock']:
+            active_connections[client_id]['data_buffer'].append([data])
+            active_connections[client_id]['last_update'] = time.time()
         
         # Process data if buffer is large enough
         if len(active_connections[client_id]['data_buffer']) >= 10:
@@ -144,8 +152,9 @@ def init_socketio(socketio: SocketIO):
                     return
         
         # Add data to buffer
-        active_connections[client_id]['data_buffer'].extend(data)
-        active_connections[client_id]['last_update'] = time.time()
+        with active_connections[client_id]['lock']:
+            active_connections[client_id]['data_buffer'].append(data)
+            active_connections[client_id]['last_update'] = time.time()
         
         # Process data
         process_data_buffer(client_id, trip_id, socketio)
@@ -155,20 +164,25 @@ def init_socketio(socketio: SocketIO):
 
 def process_data_buffer(client_id: str, trip_id: str, socketio: SocketIO):
     """Process the data buffer for a client and emit results."""
-    if client_id not in active_connections:
-        return
-    
-    # Get data buffer
-    data_buffer = active_connections[client_id]['data_buffer']
-    
-    if not data_buffer:
+    connection = active_connections.get(client_id)
+    if connection is None:
         return
     
-    # Convert to DataFrame
-    data_df = pd.DataFrame(data_buffer)
-    
-    # Process data
-    analysis = data_processor.process_realtime_data(data_df)
+    # The handlers and the background task both flush buffers; the lock
+    # hands each sample to exactly one of them, in arrival order
+    with connection['lock']:
+        # Take the data buffer
+        data_buffer = connection['data_buffer']
+        
+        if not len(data_buffer):
+            return
+        connection['data_buffer'] = SensorBatch()
+        
+        # Process data, analysing only the windows completed by the buffered samples
+        extractor = connection['extractor']
+        if extractor is None:
+            extractor = connection['extractor'] = RealtimeFeatureExtractor(data_processor)
+        analysis = data_processor.process_realtime_data(data_buffer, extractor=extractor)
     
     # Emit results to the client
     socketio.emit('realtime_feedback', {
@@ -184,9 +198,6 @@ def process_data_buffer(client_id: str, trip_id: str, socketio: SocketIO):
         'timestamp': int(time.time() * 1000),
         'analysis': analysis
     }, room=f'trip_{trip_id}')
-    
-    # Clear the buffer
-    active_connections[client_id]['data_buffer'] = []
 
 def process_pending_data(socketio: SocketIO):
     """Process any pending data in client buffers."""
@@ -1,28 +1,324 @@
-import pandas as pd
 import numpy as np
-from scipy import stats
-import joblib
 import os
-from typing import Dict, List, Tuple, Any
+import math
+from typing import TYPE_CHECKING, Dict, List, Tuple, Any, Optional, Union
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from app.model.moments import (DEFAULT_SEGMENT_LENGTH, DifferenceSums, MomentAccumulator, RunningMoments,
+                               SignChangeCounts)
+from app.model.feature_plan import FeaturePlan, SENSOR_COLUMNS
+from app.model.flat_forest import FlatForest
+from app.model.inference_batcher import InferenceBatcher
+from app.model.model_registry import ModelHandle, ModelRegistry, model_registry
+from app.model.sensor_batch import SensorBatch
+from app.model.trip_aggregates import TripAggregates
+from app.model.window_cache import WindowCache
+from app.model.events import (EVENT_THRESHOLDS, EVENT_TYPES, EventData, EventMerger, concatenate_events,
+                              count_events, empty_events, events_to_dict, make_events)
+
+# pandas is imported where DataFrames are built or read, keeping it off the serving path
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Raw trip data: a DataFrame or a columnar SensorBatch
+SensorData = Union['pd.DataFrame', SensorBatch]
+
+# Samples gathered at once for window medians selected directly (32 MB of float64)
+MEDIAN_BATCH_VALUES = 1 << 22
+
+class SlidingWindowStats:
+    """Sliding min, max and median over consecutive overlapping windows.
+    
+    Min and max use the van Herk/Gil-Werman scheme: running maxima forward and
+    backward inside blocks of window_size samples, so every window is answered
+    from two lookups regardless of its length (the array form of a monotonic
+    deque). For the median, the series is cut into blocks of
+    gcd(window_size, step) samples that are sorted once; a window is then the
+    union of consecutive sorted blocks and, when it spans at most two of them
+    (the default 50/25 windowing), its middle elements are found with a
+    vectorized binary search in O(log block) steps instead of a full select.
+    Longer windows are selected directly, a bounded number of windows at a
+    time.
+    """
+    
+    def __init__(self, values: np.ndarray, window_size: int, step: int, columns: List[str] = None):
+        """Build the structure over a (sample x axis) array."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        
+        self.values = values
+        self.window_size = window_size
+        self.step = step
+        self.columns = list(columns) if columns is not None else list(range(values.shape[1]))
+        self.starts = np.arange(0, len(values) - window_size + 1, step)
+        self._cache = {}
+    
+    def _column(self, result: np.ndarray, column) -> np.ndarray:
+        """Select one column of a (window x axis) result, or return all of them."""
+        if column is None:
+            return result
+        return result[:, self.columns.index(column)]
+    
+    def _running_extremes(self, reduce: np.ufunc) -> np.ndarray:
+        """Window extremes from forward and backward running blocks."""
+        n_windows, n_axes = len(self.starts), self.values.shape[1]
+        if n_windows == 0:
+            return np.empty((0, n_axes))
+        
+        w = self.window_size
+        n_blocks = -(-len(self.values) // w)
+        padded = np.full((n_blocks * w, n_axes), np.nan)
+        padded[:len(self.values)] = self.values
+        blocks = padded.reshape(n_blocks, w, n_axes)
+        
+        forward = reduce.accumulate(blocks, axis=1).reshape(-1, n_axes)
+        backward = reduce.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_axes)
+        return reduce(backward[self.starts], forward[self.starts + w - 1])
+    
+    def max(self, column=None) -> np.ndarray:
+        """Maximum of every window."""
+        if 'max' not in self._cache:
+            self._cache['max'] = self._running_extremes(np.maximum)
+        return self._column(self._cache['max'], column)
+    
+    def min(self, column=None) -> np.ndarray:
+        """Minimum of every window."""
+        if 'min' not in self._cache:
+            self._cache['min'] = self._running_extremes(np.minimum)
+        return self._column(self._cache['min'], column)
+    
+    def median(self, column=None) -> np.ndarray:
+        """Median of every window."""
+        if 'median' not in self._cache:
+            self._cache['median'] = self._median()
+        return self._column(self._cache['median'], column)
+    
+    def _median(self) -> np.ndarray:
+        """Compute window medians from pre-sorted blocks."""
+        n_windows, n_axes = len(self.starts), self.values.shape[1]
+        if n_windows == 0:
+            return np.empty((0, n_axes))
+        
+        w = self.window_size
+        block = math.gcd(w, self.step)
+        blocks_per_window = w // block
+        if blocks_per_window > 2:
+            # Windows spanning many blocks: fall back to a direct select, in
+            # batches of windows holding at most MEDIAN_BATCH_VALUES samples
+            batch = max(1, MEDIAN_BATCH_VALUES // (w * n_axes))
+            median = np.empty((n_windows, n_axes))
+            for first in range(0, n_windows, batch):
+                starts = self.starts[first:first + batch, np.newaxis] + np.arange(w)
+                median[first:first + batch] = np.median(self.values[starts], axis=1)
+            return median
+        
+        # Sort each block once; windows start on block boundaries
+        n_blocks = (self.starts[-1] + w) // block
+        blocks = np.sort(self.values[:n_blocks * block].reshape(n_blocks, block, n_axes), axis=1)
+        first = blocks[self.starts // block]
+        
+        if blocks_per_window == 1:
+            low, high = first[:, (w - 1) // 2], first[:, w // 2]
+        else:
+            low, high = self._middle_of_two(first, blocks[self.starts // block + 1], w // 2)
+        
+        # Windows containing NaN yield NaN, as np.median does
+        median = (low + high) / 2 if w % 2 == 0 else high
+        nan_counts = np.concatenate([np.zeros((1, n_axes)), np.cumsum(np.isnan(self.values), axis=0)])
+        has_nan = (nan_counts[self.starts + w] - nan_counts[self.starts]) > 0
+        return np.where(has_nan, np.nan, median)
+    
+    @staticmethod
+    def _middle_of_two(a: np.ndarray, b: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the k-1-th and k-th smallest of two sorted arrays per row.
+        
+        a and b are (window x block x axis) arrays sorted along axis 1. The
+        count i of elements taken from a among the k smallest is found by
+        binary search on the smallest i with a[i] >= b[k - i - 1].
+        """
+        size = a.shape[1]
+        shape = (a.shape[0], 1, a.shape[2])
+        lo = np.full(shape, max(0, k - size))
+        hi = np.full(shape, min(k, size))
+        
+        def take(arr, idx, fill):
+            valid = (idx >= 0) & (idx < size)
+            picked = np.take_along_axis(arr, np.clip(idx, 0, size - 1), axis=1)
+            return np.where(valid, picked, fill)
+        
+        while (lo < hi).any():
+            mid = (lo + hi) // 2
+            more_from_a = take(a, mid, np.inf) < take(b, k - mid - 1, -np.inf)
+            lo = np.where((lo < hi) & more_from_a, mid + 1, lo)
+            hi = np.where((lo < hi) & ~more_from_a, mid, hi)
+        
+        i, j = lo, k - lo
+        low = np.maximum(take(a, i - 1, -np.inf), take(b, j - 1, -np.inf))
+        high = np.minimum(take(a, i, np.inf), take(b, j, np.inf))
+        return low[:, 0], high[:, 0]
+
+class TripSeries:
+    """Cumulative sums over a trip's series, shared by windowings of any size.
+    
+    Prefix power sums of the sensor axes and magnitude series, prefix counts
+    of sign changes and prefix sums of squared acceleration differences
+    (jerk) are accumulated once per trip. TripWindows for any
+    (window_size, step) read their window moments, zero crossings and jerk
+    variances from them with O(1) lookups per window. The whole-trip
+    acceleration moments used for the consistency score are kept alongside.
+    """
+    
+    def __init__(self, series: np.ndarray, columns: List[str], timestamps: Optional[np.ndarray],
+                 moment_order: int = 4, shift: np.ndarray = None):
+        """Accumulate the shared sums over a (sample x series) array.
+        
+        shift centers the moment power sums (see MomentAccumulator).
+        """
+        values = np.asarray(series, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        
+        self.values = values
+        self.columns = list(columns)
+        self.timestamps = timestamps
+        self.moment_order = moment_order
+        self.sensor_columns = [col for col in self.columns if col in SENSOR_COLUMNS]
+        
+        self.accumulator = None
+        if moment_order:
+            self.accumulator = MomentAccumulator(values, max_order=moment_order, shift=shift)
+        self._sign_changes = None
+        
+        acc_axes = ['AccX', 'AccY', 'AccZ']
+        self.has_acc = all(col in self.columns for col in acc_axes)
+        self.acc_moments = None
+        self.jerk_sums = None
+        if self.has_acc:
+            acc = values[:, [self.columns.index(col) for col in acc_axes]]
+            self.acc_moments = RunningMoments.from_values(acc)
+            self.jerk_sums = DifferenceSums(acc)
+    
+    @property
+    def sign_changes(self) -> SignChangeCounts:
+        """Sign change counts of the sensor axes, accumulated on first use."""
+        if self._sign_changes is None:
+            self._sign_changes = SignChangeCounts(self.values[:, :len(self.sensor_columns)])
+        return self._sign_changes
+    
+    def windows(self, window_size: int, step: int) -> 'TripWindows':
+        """Window the series with the given size and step, in samples."""
+        return TripWindows(self, window_size, step)
+
+class TripWindows:
+    """Per-window intermediates of a trip, shared by features, events and scores.
+    
+    Window moments and jerk standard deviations are read from the cumulative
+    sums of a TripSeries; sliding order statistics are built for the
+    windowing itself.
+    """
+    
+    def __init__(self, series: TripSeries, window_size: int, step: int):
+        """Window a TripSeries with the given size and step, in samples."""
+        self.series = series
+        self.stats = SlidingWindowStats(series.values, window_size, step, series.columns)
+        self.values = self.stats.values
+        self.columns = self.stats.columns
+        self.starts = self.stats.starts
+        self.timestamps = series.timestamps
+        self.window_size = window_size
+        self.step = step
+        self.acc_moments = series.acc_moments
+        
+        # Standard deviation of jerk (derivative of acceleration) inside every window
+        self.jerk_std = None
+        if series.jerk_sums is not None and len(self.starts):
+            self.jerk_std = np.sqrt(series.jerk_sums.window_variance(self.starts, window_size))
+        
+        self.moments: Dict[str, np.ndarray] = {}
+        if series.accumulator is not None and len(self.starts):
+            self.moments = series.accumulator.window_moments(self.starts, window_size)
+    
+    def __len__(self) -> int:
+        """Number of complete windows."""
+        return len(self.starts)
+    
+    def zero_crossings(self) -> np.ndarray:
+        """Zero crossings of every sensor axis in every window."""
+        return self.series.sign_changes.window_counts(self.starts, self.window_size)
+    
+    def window_timestamps(self) -> np.ndarray:
+        """Timestamp of every window's middle sample, or its start index without timestamps."""
+        if self.timestamps is not None:
+            return self.timestamps[self.starts + self.window_size // 2]
+        return self.starts
 
 class DataProcessor:
-    def __init__(self, model_path: str = 'app/model/trained_models/driver_model.pkl'):
-        """Initialize the data processor with the trained model."""
+    def __init__(self, model_path: str = 'app/model/trained_models/driver_model.pkl',
+                 resolutions: List[Tuple[int, int]] = None, registry: ModelRegistry = None):
+        """Initialize the data processor with the trained model.
+        
+        The model is shared through registry (the process-wide one by
+        default), so processors of the same model_path load it once, on first
+        use, and all pick up a version reloaded after training. An empty
+        model_path means no model. resolutions lists the (window_size, step) configurations,
+        in samples, computed by extract_multiresolution_features; by default
+        only the processor's own windowing.
+        """
         self.model_path = model_path
-        self.model = self._load_model() if os.path.exists(model_path) else None
+        self.registry = registry if registry is not None else model_registry
         self.window_size = 50  # Number of data points to consider for a window
         self.overlap = 25      # Overlap between consecutive windows
         
-    def _load_model(self):
-        """Load the trained model from disk."""
-        try:
-            return joblib.load(self.model_path)
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            return None
+        # The flattened forest predicts small batches; sklearn's compiled
+        # per-tree loop wins on large ones
+        self.flat_model_max_rows = 256
+        
+        # Shared micro-batcher for the predictions of concurrent callers (see enable_inference_batching)
+        self.inference_batcher: Optional[InferenceBatcher] = None
+        
+        # Real-time chunks up to this many rows use the NumPy-only path
+        self.fast_path_max_rows = 512
+        
+        # Merge triggers of consecutive windows into single events
+        self.merge_events = True
+        
+        # Windowings computed together from one set of cumulative sums
+        if resolutions is None:
+            resolutions = [(self.window_size, self.window_size - self.overlap)]
+        self.resolutions = list(resolutions)
+        for window_size, step in self.resolutions:
+            if window_size < 2 or step < 1:
+                raise ValueError(f"Invalid resolution (window_size={window_size}, step={step})")
+        
+    @property
+    def model_handle(self) -> ModelHandle:
+        """Current version of the model; hold on to it for a consistent view across calls."""
+        return self.registry.get(self.model_path)
+    
+    @property
+    def model(self):
+        """Current model, taking unscaled features, or None if there is none."""
+        return self.model_handle.model
+    
+    @property
+    def feature_plan(self) -> FeaturePlan:
+        """Features the current model reads."""
+        return self.model_handle.feature_plan
+    
+    @property
+    def flat_model(self) -> Optional[FlatForest]:
+        """Flattened copy of the current model, if it is a tree ensemble."""
+        return self.model_handle.flat_model
     
-    def preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
+    def preprocess_data(self, data: SensorData) -> SensorData:
         """Preprocess the raw motion data."""
+        if isinstance(data, SensorBatch):
+            return self._preprocess_batch(data)
+        import pandas as pd
+        
         # Handle missing values
         data = data.fillna(method='ffill').fillna(method='bfill')
         
@@ -38,154 +334,394 @@ class DataProcessor:
         
         return data
     
-    def extract_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Extract features from preprocessed data."""
-        features = []
+    def _preprocess_batch(self, batch: SensorBatch) -> SensorBatch:
+        """Fill missing values and sort a SensorBatch without going through pandas."""
+        values = batch.values
+        missing = np.isnan(values)
+        if missing.any():
+            # Forward fill, then backward fill what is still missing at the start
+            rows = np.arange(len(values))[:, np.newaxis]
+            last_valid = np.maximum.accumulate(np.where(missing, 0, rows), axis=0)
+            next_valid = np.minimum.accumulate(np.where(missing, len(values) - 1, rows)[::-1], axis=0)[::-1]
+            filled = np.take_along_axis(values, last_valid, axis=0)
+            still_missing = np.isnan(filled)
+            filled[still_missing] = np.take_along_axis(values, next_valid, axis=0)[still_missing]
+            batch = SensorBatch(filled, batch.timestamps)
         
-        # Process data in windows with overlap
-        for i in range(0, len(data) - self.window_size + 1, self.window_size - self.overlap):
-            window = data.iloc[i:i + self.window_size]
-            
-            # Skip windows that are too small
-            if len(window) < self.window_size:
-                continue
-                
-            window_features = {}
-            
-            # Time-domain features for each axis
-            for col in ['AccX', 'AccY', 'AccZ', 'GyroX', 'GyroY', 'GyroZ']:
-                if col in window.columns:
-                    values = window[col].values
-                    window_features[f'{col}_mean'] = np.mean(values)
-                    window_features[f'{col}_std'] = np.std(values)
-                    window_features[f'{col}_max'] = np.max(values)
-                    window_features[f'{col}_min'] = np.min(values)
-                    window_features[f'{col}_range'] = np.max(values) - np.min(values)
-                    window_features[f'{col}_median'] = np.median(values)
-                    window_features[f'{col}_kurtosis'] = stats.kurtosis(values)
-                    window_features[f'{col}_skew'] = stats.skew(values)
-                    
-                    # Zero crossings
-                    zero_crossings = np.where(np.diff(np.signbit(values)))[0]
-                    window_features[f'{col}_zero_crossings'] = len(zero_crossings)
-                    
-                    # Peak-to-peak
-                    window_features[f'{col}_p2p'] = np.max(values) - np.min(values)
-            
-            # Magnitude features
-            if all(col in window.columns for col in ['AccX', 'AccY', 'AccZ']):
-                acc_mag = np.sqrt(window['AccX']**2 + window['AccY']**2 + window['AccZ']**2)
-                window_features['Acc_mag_mean'] = np.mean(acc_mag)
-                window_features['Acc_mag_std'] = np.std(acc_mag)
-                window_features['Acc_mag_max'] = np.max(acc_mag)
-                
-            if all(col in window.columns for col in ['GyroX', 'GyroY', 'GyroZ']):
-                gyro_mag = np.sqrt(window['GyroX']**2 + window['GyroY']**2 + window['GyroZ']**2)
-                window_features['Gyro_mag_mean'] = np.mean(gyro_mag)
-                window_features['Gyro_mag_std'] = np.std(gyro_mag)
-                window_features['Gyro_mag_max'] = np.max(gyro_mag)
-            
-            # Add window timestamp (middle of window)
-            if 'Timestamp' in window.columns:
-                window_features['Timestamp'] = window['Timestamp'].iloc[len(window) // 2]
-            
-            features.append(window_features)
+        # Sort by timestamp
+        return batch.sort_by_timestamp()
+    
+    def _sensor_arrays(self, data: SensorData) -> Tuple[List[str], np.ndarray]:
+        """Return the sensor columns present in data and their values as float64."""
+        if isinstance(data, SensorBatch):
+            return list(SENSOR_COLUMNS), data.values.astype(np.float64)
         
+        columns = [col for col in SENSOR_COLUMNS if col in data.columns]
+        return columns, data[columns].to_numpy(dtype=np.float64)
+    
+    def _timestamps(self, data: SensorData) -> Optional[np.ndarray]:
+        """Return the timestamp column, or None if data has none."""
+        if isinstance(data, SensorBatch):
+            return data.timestamps
+        return data['Timestamp'].to_numpy() if 'Timestamp' in data.columns else None
+    
+    def _window_starts(self, n_samples: int) -> np.ndarray:
+        """Return the start index of every complete window in a series of n_samples."""
+        return np.arange(0, n_samples - self.window_size + 1, self.window_size - self.overlap)
+    
+    def _window_series(self, data: SensorData) -> Tuple[List[str], np.ndarray]:
+        """Return the sensor columns present in data, plus magnitude series, as one array."""
+        columns, values = self._sensor_arrays(data)
+        
+        series = [values]
+        for prefix, axes in (('Acc', ['AccX', 'AccY', 'AccZ']), ('Gyro', ['GyroX', 'GyroY', 'GyroZ'])):
+            if all(col in columns for col in axes):
+                idx = [columns.index(col) for col in axes]
+                series.append(np.sqrt((values[:, idx] ** 2).sum(axis=1))[:, np.newaxis])
+                columns = columns + [f'{prefix}_mag']
+        
+        return columns, np.concatenate(series, axis=1)
+    
+    def build_trip_series(self, data: SensorData, plan: FeaturePlan = None) -> TripSeries:
+        """Accumulate the cumulative sums over data shared by every windowing.
+        
+        Power sums are accumulated up to the moment order the plan needs (all
+        features if no plan is given).
+        """
+        if plan is None:
+            plan = FeaturePlan.full()
+        columns, series = self._window_series(data)
+        return TripSeries(series, columns, self._timestamps(data), plan.moment_order)
+    
+    def build_trip_windows(self, data: SensorData, plan: FeaturePlan = None) -> TripWindows:
+        """Run the single pass over data shared by feature extraction, event detection and scoring."""
+        return self.build_trip_series(data, plan).windows(self.window_size, self.window_size - self.overlap)
+    
+    def extract_features(self, data: SensorData, windows: TripWindows = None,
+                         plan: FeaturePlan = None) -> 'pd.DataFrame':
+        """Extract features from preprocessed data.
+        
+        By default every feature is extracted. With a FeaturePlan only the
+        planned columns are emitted and statistic families the plan does not
+        need are never computed. Shared windows must be built for the same plan.
+        """
+        import pandas as pd
+        
+        features = self._feature_columns(data, windows, plan)
         return pd.DataFrame(features) if features else pd.DataFrame()
     
-    def detect_events(self, data: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
-        """Detect driving events from the data."""
-        events = {
-            'harsh_acceleration': [],
-            'harsh_braking': [],
-            'harsh_cornering': [],
-            'phone_usage': [],
-            'speeding': []
-        }
+    def extract_features_parallel(self, data: SensorData, workers: int = None,
+                                  plan: FeaturePlan = None) -> 'pd.DataFrame':
+        """Extract features from preprocessed data on a pool of worker processes.
         
-        # Thresholds for event detection
-        acc_threshold = 0.5  # m/s²
-        brake_threshold = -0.5  # m/s²
-        corner_threshold = 0.4  # rad/s
+        The window series is placed in shared memory and cut into chunks that
+        overlap by window_size - 1 samples; every worker extracts the windows
+        starting in its chunk and the columns are stitched back in trip order.
+        Chunks start on moment segment boundaries and share the whole-trip
+        centering, so the result equals extract_features. Data too short to
+        fill two chunks is extracted serially.
+        """
+        import pandas as pd
         
-        # Process data in windows
-        for i in range(0, len(data) - self.window_size + 1, self.window_size - self.overlap):
-            window = data.iloc[i:i + self.window_size]
-            
-            # Skip windows that are too small
-            if len(window) < self.window_size:
-                continue
-                
-            timestamp = window['Timestamp'].iloc[len(window) // 2] if 'Timestamp' in window.columns else i
-            
-            # Harsh acceleration detection
-            if 'AccX' in window.columns and window['AccX'].max() > acc_threshold:
-                events['harsh_acceleration'].append({
-                    'timestamp': timestamp,
-                    'value': window['AccX'].max(),
-                    'duration': self.window_size
-                })
-            
-            # Harsh braking detection
-            if 'AccX' in window.columns and window['AccX'].min() < brake_threshold:
-                events['harsh_braking'].append({
-                    'timestamp': timestamp,
-                    'value': window['AccX'].min(),
-                    'duration': self.window_size
-                })
-            
-            # Harsh cornering detection
-            if 'GyroZ' in window.columns and (window['GyroZ'].max() > corner_threshold or window['GyroZ'].min() < -corner_threshold):
-                events['harsh_cornering'].append({
-                    'timestamp': timestamp,
-                    'value': window['GyroZ'].max() if abs(window['GyroZ'].max()) > abs(window['GyroZ'].min()) else window['GyroZ'].min(),
-                    'duration': self.window_size
-                })
+        if plan is None:
+            plan = FeaturePlan.full()
+        workers = workers or os.cpu_count() or 1
+        columns, series = self._window_series(data)
+        starts = self._window_starts(len(series))
+        
+        # Chunk lengths are whole numbers of both window steps and moment segments
+        step = self.window_size - self.overlap
+        alignment = math.lcm(step, DEFAULT_SEGMENT_LENGTH)
+        chunk_length = alignment * max(1, math.ceil(len(series) / workers / alignment))
+        chunk_starts = list(range(0, int(starts[-1]) + 1, chunk_length)) if len(starts) else []
+        if workers <= 1 or len(chunk_starts) <= 1:
+            return self.extract_features(data, plan=plan)
+        
+        memory = shared_memory.SharedMemory(create=True, size=series.nbytes)
+        try:
+            np.ndarray(series.shape, dtype=series.dtype, buffer=memory.buf)[:] = series
+            shift = MomentAccumulator.centering(series)
+            tasks = [(memory.name, series.shape, columns, start,
+                      min(start + chunk_length + self.window_size - 1, len(series)),
+                      shift, self.window_size, self.overlap, plan)
+                     for start in chunk_starts]
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                chunks = list(executor.map(_extract_chunk_features, tasks))
+        finally:
+            memory.close()
+            memory.unlink()
+        
+        features = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+        timestamps = self._timestamps(data)
+        if timestamps is not None:
+            features['Timestamp'] = timestamps[starts + self.window_size // 2]
+        return pd.DataFrame(features) if features else pd.DataFrame()
+    
+    def extract_multiresolution_features(self, data: SensorData, resolutions: List[Tuple[int, int]] = None,
+                                         plan: FeaturePlan = None) -> Dict[str, 'pd.DataFrame']:
+        """Extract features of preprocessed data for several windowings at once.
+        
+        Every (window_size, step) configuration reads its moments, zero
+        crossings and jerk from one set of cumulative sums over data. Returns a
+        feature frame per configuration, keyed by a prefix such as 'w50_s25'
+        that also prefixes its feature columns (Timestamp is left as is).
+        """
+        import pandas as pd
+        
+        if resolutions is None:
+            resolutions = self.resolutions
+        if plan is None:
+            plan = FeaturePlan.full()
+        
+        series = self.build_trip_series(data, plan)
+        frames = {}
+        for window_size, step in resolutions:
+            prefix = f'w{window_size}_s{step}'
+            features = self._feature_columns(data, series.windows(window_size, step), plan)
+            frames[prefix] = pd.DataFrame({
+                name if name == 'Timestamp' else f'{prefix}_{name}': values
+                for name, values in features.items()
+            })
+        return frames
+    
+    def window_labels(self, data: 'pd.DataFrame', column: str = 'Class', default: str = 'UNKNOWN') -> np.ndarray:
+        """Majority label of every feature window of data, in extract_features row order.
+        
+        Labels are one-hot encoded and counted per window from cumulative
+        counts. Ties go to the label occurring first in the window, as
+        value_counts() orders them; windows without labels get default.
+        """
+        import pandas as pd
+        
+        starts = self._window_starts(len(data))
+        codes, labels = pd.factorize(data[column])
+        if len(labels) == 0:
+            return np.full(len(starts), default, dtype=object)
+        
+        one_hot = codes[:, np.newaxis] == np.arange(len(labels))
+        counts = np.zeros((len(codes) + 1, len(labels)), dtype=np.int64)
+        np.cumsum(one_hot, axis=0, out=counts[1:])
+        window_counts = counts[starts + self.window_size] - counts[starts]
+        
+        # Position of each label's next occurrence at or after every sample
+        rows = np.arange(len(codes))[:, np.newaxis]
+        next_occurrence = np.minimum.accumulate(np.where(one_hot, rows, len(codes))[::-1], axis=0)[::-1]
+        
+        is_majority = window_counts == window_counts.max(axis=1, keepdims=True)
+        first_seen = np.where(is_majority, next_occurrence[starts], len(codes))
+        majority = np.asarray(labels, dtype=object)[first_seen.argmin(axis=1)]
+        majority[window_counts.max(axis=1) == 0] = default
+        return majority
+    
+    def _feature_columns(self, data: SensorData, windows: TripWindows = None,
+                         plan: FeaturePlan = None) -> Dict[str, np.ndarray]:
+        """Compute feature columns as arrays keyed by name, in extract_features order."""
+        if plan is None:
+            plan = FeaturePlan.full()
+        if windows is None:
+            if len(self._window_starts(len(data))) == 0:
+                return {}
+            windows = self.build_trip_windows(data, plan)
+        if len(windows) == 0:
+            return {}
+        window_stats = windows.stats
+        
+        features = {}
+        
+        columns = windows.columns
+        moments = windows.moments
+        if plan.needs('extremes'):
+            max_ = window_stats.max()
+            min_ = window_stats.min()
+        
+        # Time-domain features for each axis, computed for every window at once
+        sensor_columns = [col for col in columns if col in SENSOR_COLUMNS]
+        if sensor_columns:
+            if plan.needs('median'):
+                median = window_stats.median()
             
-            # Phone usage detection (high frequency vibrations)
-            if all(col in window.columns for col in ['AccX', 'AccY', 'AccZ']):
-                # Calculate jerk (derivative of acceleration)
-                jerk_x = np.diff(window['AccX'].values)
-                jerk_y = np.diff(window['AccY'].values)
-                jerk_z = np.diff(window['AccZ'].values)
-                
-                # High frequency components indicate potential phone usage
-                if (np.std(jerk_x) > 0.2 and np.std(jerk_y) > 0.2 and np.std(jerk_z) > 0.2):
-                    events['phone_usage'].append({
-                        'timestamp': timestamp,
-                        'value': np.std(jerk_x) + np.std(jerk_y) + np.std(jerk_z),
-                        'duration': self.window_size
-                    })
-        
-        return events
-    
-    def predict_behavior(self, features: pd.DataFrame) -> List[str]:
-        """Predict driving behavior using the trained model."""
-        if self.model is None:
-            return ['UNKNOWN'] * len(features)
-        
-        # Select only the features used during training
-        model_features = self.model.feature_names_in_ if hasattr(self.model, 'feature_names_in_') else None
-        
-        if model_features is not None:
-            # Keep only the features that exist in both the model and the current features
-            common_features = [f for f in model_features if f in features.columns]
-            if not common_features:
-                return ['UNKNOWN'] * len(features)
+            # Zero crossings
+            if plan.needs('zero_crossings'):
+                zero_crossings = windows.zero_crossings()
             
-            X = features[common_features]
-        else:
-            # If we don't know the model features, use all except Timestamp
-            X = features.drop(['Timestamp'], axis=1, errors='ignore')
+            for j, col in enumerate(sensor_columns):
+                column_features = {
+                    'mean': lambda: moments['mean'][:, j],
+                    'std': lambda: moments['std'][:, j],
+                    'max': lambda: max_[:, j],
+                    'min': lambda: min_[:, j],
+                    'range': lambda: max_[:, j] - min_[:, j],
+                    'median': lambda: median[:, j],
+                    'kurtosis': lambda: moments['kurtosis'][:, j],
+                    'skew': lambda: moments['skew'][:, j],
+                    'zero_crossings': lambda: zero_crossings[:, j],
+                    # Peak-to-peak
+                    'p2p': lambda: max_[:, j] - min_[:, j]
+                }
+                for stat, compute in column_features.items():
+                    if plan.wants(f'{col}_{stat}'):
+                        features[f'{col}_{stat}'] = compute()
+        
+        # Magnitude features
+        for j in range(len(sensor_columns), len(columns)):
+            magnitude_features = {
+                'mean': lambda: moments['mean'][:, j],
+                'std': lambda: moments['std'][:, j],
+                'max': lambda: max_[:, j]
+            }
+            for stat, compute in magnitude_features.items():
+                if plan.wants(f'{columns[j]}_{stat}'):
+                    features[f'{columns[j]}_{stat}'] = compute()
+        
+        # Add window timestamp (middle of window)
+        if windows.timestamps is not None:
+            features['Timestamp'] = windows.window_timestamps()
+        
+        return features
+    
+    def event_signals(self, windows: TripWindows) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Per-window trigger signal and reported value of every detectable event type.
+        
+        Signals grow with severity and are compared against EVENT_THRESHOLDS.
+        """
+        window_stats = windows.stats
+        columns = windows.columns
+        signals = {}
+        
+        if 'AccX' in columns:
+            acc_max = window_stats.max('AccX')
+            acc_min = window_stats.min('AccX')
+            signals['harsh_acceleration'] = (acc_max, acc_max)
+            signals['harsh_braking'] = (-acc_min, acc_min)
+        
+        if 'GyroZ' in columns:
+            gyro_max = window_stats.max('GyroZ')
+            gyro_min = window_stats.min('GyroZ')
+            signals['harsh_cornering'] = (np.maximum(gyro_max, -gyro_min),
+                                          np.where(np.abs(gyro_max) > np.abs(gyro_min), gyro_max, gyro_min))
+        
+        # High frequency vibrations: standard deviation of jerk (derivative of
+        # acceleration) high on every axis
+        if windows.jerk_std is not None:
+            signals['phone_usage'] = (windows.jerk_std.min(axis=1), windows.jerk_std.sum(axis=1))
+        
+        return signals
+    
+    def detect_events(self, data: SensorData, windows: TripWindows = None,
+                      merger: EventMerger = None) -> np.ndarray:
+        """Detect driving events from the data.
+        
+        Every window is tested at once against the enter thresholds of
+        EVENT_THRESHOLDS. Events come back as a structured array of EVENT_DTYPE
+        rows, grouped by type in EVENT_TYPES order and by window within a type;
+        events_to_dict turns it into the per-type lists of the JSON responses.
+        
+        With an EventMerger, consecutive triggers are merged into single events
+        and only the events closed by these windows are returned; call
+        merger.flush() once no more data will follow.
+        """
+        if windows is None:
+            windows = self.build_trip_windows(data, FeaturePlan([]))
+        
+        return self._events_from_signals(windows.window_timestamps(), self.event_signals(windows),
+                                         windows.window_size, merger)
+    
+    def _events_from_signals(self, timestamps: np.ndarray, signals: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                             window_size: int, merger: EventMerger = None) -> np.ndarray:
+        """Turn per-window trigger signals into events, merged by merger if given."""
+        if merger is not None:
+            return merger.update(timestamps, signals)
+        
+        events = []
+        for event_type, (signal, values) in signals.items():
+            triggered = signal > EVENT_THRESHOLDS[event_type][0]
+            events.append(make_events(event_type, timestamps[triggered], values[triggered], window_size))
+        return concatenate_events(events)
+    
+    def _detect_merged_events(self, data: SensorData, windows: TripWindows) -> np.ndarray:
+        """Detect events in self-contained data, merging triggers if enabled."""
+        return self._trip_events(windows.window_timestamps(), self.event_signals(windows), windows.window_size)
+    
+    def _trip_events(self, timestamps: np.ndarray, signals: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                     window_size: int) -> np.ndarray:
+        """Events of the complete signals of a trip or chunk, merging triggers if enabled."""
+        if not self.merge_events:
+            return self._events_from_signals(timestamps, signals, window_size)
+        
+        merger = EventMerger(window_size, self.window_size - self.overlap)
+        return concatenate_events([self._events_from_signals(timestamps, signals, window_size, merger),
+                                   merger.flush()])
+    
+    def predict_behavior(self, features: 'pd.DataFrame', handle: ModelHandle = None) -> List[str]:
+        """Predict driving behavior using the trained model (the current version unless handle is given)."""
+        return self._predict_feature_matrix(list(features.columns), features.to_numpy(dtype=np.float64), handle)
+    
+    def _feature_matrix(self, features: Dict[str, np.ndarray]) -> Tuple[List[str], np.ndarray]:
+        """Stack feature columns into a (window x feature) matrix and return it with its column names."""
+        names = list(features)
+        return names, np.column_stack([features[name] for name in names]).astype(np.float64)
+    
+    def _predict_feature_matrix(self, names: List[str], matrix: np.ndarray,
+                                handle: ModelHandle = None) -> List[str]:
+        """Predict behaviors from a (window x feature) matrix with the given column names."""
+        if handle is None:
+            handle = self.model_handle
+        if handle.model is None:
+            return ['UNKNOWN'] * len(matrix)
+        
+        # Order columns as the model expects them. Columns the feature plan
+        # skipped are never read by the model, so their fill value is irrelevant.
+        if not handle.feature_plan.features.issubset(names):
+            return ['UNKNOWN'] * len(matrix)
+        
+        model_features = handle.feature_plan.model_features
+        X = np.zeros((len(matrix), len(model_features)))
+        positions = {name: i for i, name in enumerate(names)}
+        for j, name in enumerate(model_features):
+            if name in positions:
+                X[:, j] = matrix[:, positions[name]]
         
         try:
-            return self.model.predict(X)
+            if self.inference_batcher is not None and len(X) <= self.inference_batcher.max_batch_rows:
+                return self.inference_batcher.predict(X, handle)
+            return self._predict_model_rows(X, handle)
         except Exception as e:
             print(f"Prediction error: {e}")
-            return ['UNKNOWN'] * len(features)
+            return ['UNKNOWN'] * len(matrix)
+    
+    def _predict_model_rows(self, X: np.ndarray, handle: ModelHandle) -> np.ndarray:
+        """Run a model version on a matrix whose columns are in its model_features order."""
+        if handle.flat_model is not None and len(X) <= self.flat_model_max_rows:
+            return handle.flat_model.predict(X)
+        
+        # Models fitted on a DataFrame validate column names
+        if hasattr(handle.model, 'feature_names_in_'):
+            import pandas as pd
+            X = pd.DataFrame(X, columns=handle.feature_plan.model_features)
+        return handle.model.predict(X)
+    
+    def enable_inference_batching(self, max_batch_rows: int = 256, max_wait_ms: float = 2.0):
+        """Batch the small predict calls of concurrent callers into shared model calls.
+        
+        A call waits up to max_wait_ms for others and a batch holds at most
+        max_batch_rows windows; larger calls bypass the batcher.
+        """
+        self.inference_batcher = InferenceBatcher(self._predict_model_rows, max_batch_rows, max_wait_ms)
     
-    def calculate_scores(self, data: pd.DataFrame, events: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
-        """Calculate driver scores based on data and detected events."""
+    def calculate_scores(self, data: SensorData, events: EventData,
+                         windows: TripWindows = None) -> Dict[str, float]:
+        """Calculate driver scores based on data and detected events.
+        
+        events may be an event array or per-type event lists. Shared windows
+        built over the same data supply the acceleration moments.
+        """
+        event_counts = {event_type: count_events(events, event_type) for event_type in EVENT_TYPES}
+        acc_moments = windows.acc_moments if windows is not None else self._acc_moments(data)
+        return self._scores_from_totals(event_counts, acc_moments)
+    
+    def _scores_from_totals(self, event_counts: Dict[str, int],
+                            acc_moments: Optional[RunningMoments]) -> Dict[str, float]:
+        """Scores from the event counts by type and the acceleration moments of a trip."""
         scores = {
             'overall': 0.0,
             'acceleration': 0.0,
@@ -199,10 +735,10 @@ class DataProcessor:
         base_score = 100
         
         # Penalties for events
-        acc_penalty = 5 * len(events['harsh_acceleration'])
-        brake_penalty = 5 * len(events['harsh_braking'])
-        corner_penalty = 5 * len(events['harsh_cornering'])
-        phone_penalty = 10 * len(events['phone_usage'])
+        acc_penalty = 5 * event_counts['harsh_acceleration']
+        brake_penalty = 5 * event_counts['harsh_braking']
+        corner_penalty = 5 * event_counts['harsh_cornering']
+        phone_penalty = 10 * event_counts['phone_usage']
         
         # Calculate individual scores
         scores['acceleration'] = max(0, 100 - acc_penalty)
@@ -211,8 +747,8 @@ class DataProcessor:
         scores['phone_usage'] = max(0, 100 - phone_penalty)
         
         # Calculate consistency score based on standard deviation of acceleration
-        if 'AccX' in data.columns and 'AccY' in data.columns and 'AccZ' in data.columns:
-            acc_std = np.mean([np.std(data['AccX']), np.std(data['AccY']), np.std(data['AccZ'])])
+        if acc_moments is not None:
+            acc_std = np.mean(acc_moments.std)
             # Lower std deviation means more consistent driving
             consistency_score = 100 * np.exp(-acc_std)
             scores['consistency'] = min(100, max(0, consistency_score))
@@ -236,35 +772,61 @@ class DataProcessor:
         
         return scores
     
-    def process_trip_data(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Process trip data and return comprehensive analysis."""
-        # Preprocess data
-        processed_data = self.preprocess_data(data)
-        
-        # Extract features
-        features = self.extract_features(processed_data)
+    def _acc_moments(self, data: SensorData) -> Optional[RunningMoments]:
+        """Moments of (AccX, AccY, AccZ) over all of data, or None if an axis is missing."""
+        columns, values = self._sensor_arrays(data)
+        if not all(col in columns for col in ['AccX', 'AccY', 'AccZ']):
+            return None
+        return RunningMoments.from_values(values[:, [columns.index(col) for col in ['AccX', 'AccY', 'AccZ']]])
+    
+    def process_trip_data(self, data: SensorData, cache: WindowCache = None) -> Dict[str, Any]:
+        """Process trip data and return comprehensive analysis.
         
-        # Detect events
-        events = self.detect_events(processed_data)
+        With the trip's WindowCache, windows already analysed in real time are
+        reused and only the missing ones are computed.
+        """
+        # One model version serves the whole analysis
+        handle = self.model_handle
         
-        # Calculate scores
-        scores = self.calculate_scores(processed_data, events)
+        # Preprocess data
+        processed_data = self.preprocess_data(data)
         
-        # Predict behaviors if model is available
-        behaviors = []
-        if self.model is not None and not features.empty:
-            behaviors = self.predict_behavior(features)
+        cached = self._cached_trip_windows(processed_data, cache, handle)
+        if cached is not None:
+            # Features, events and behaviors of the windows not cached yet only
+            behaviors, events = self._analyse_uncached_windows(processed_data, cache, cached, handle)
+            
+            # Calculate scores
+            scores = self.calculate_scores(processed_data, events)
+        else:
+            # Single pass over the windows shared by features, events and scores
+            windows = self.build_trip_windows(processed_data, handle.feature_plan)
+            
+            # Extract features
+            features = self._feature_columns(processed_data, windows, handle.feature_plan)
+            
+            # Detect events
+            events = self._detect_merged_events(processed_data, windows)
+            
+            # Calculate scores
+            scores = self.calculate_scores(processed_data, events, windows)
+            
+            # Predict behaviors if model is available
+            behaviors = []
+            if handle.model is not None and len(windows):
+                behaviors = self._predict_feature_matrix(*self._feature_matrix(features), handle)
         
         # Calculate trip statistics
+        timestamps = self._timestamps(processed_data)
         stats = {
-            'trip_duration': (processed_data['Timestamp'].max() - processed_data['Timestamp'].min()) / 1000 if 'Timestamp' in processed_data.columns else 0,
+            'trip_duration': (timestamps.max() - timestamps.min()) / 1000 if timestamps is not None and len(timestamps) else 0,
             'data_points': len(processed_data),
-            'event_count': sum(len(events[e]) for e in events),
+            'event_count': len(events),
             'behavior_distribution': {}
         }
         
         # Calculate behavior distribution
-        if behaviors:
+        if len(behaviors):
             behavior_counts = {}
             for behavior in behaviors:
                 behavior_counts[behavior] = behavior_counts.get(behavior, 0) + 1
@@ -274,38 +836,264 @@ class DataProcessor:
         
         return {
             'scores': scores,
-            'events': events,
+            'events': events_to_dict(events),
+            'statistics': stats
+        }
+    
+    def provisional_trip_analysis(self, data: SensorData, extractor=None) -> Dict[str, Any]:
+        """Scores and statistics of an active trip, as process_trip_data would return them.
+        
+        data holds every sample received so far. When the RealtimeFeatureExtractor
+        that ingested them has valid running aggregates, the analysis comes from
+        those in O(1) and omits the event list; otherwise the whole trip is
+        processed.
+        """
+        if extractor is not None:
+            analysis = self._analysis_from_aggregates(extractor.aggregates.snapshot(), len(data))
+            if analysis is not None:
+                return analysis
+        
+        return self.process_trip_data(data, cache=extractor.window_cache if extractor is not None else None)
+    
+    def _analysis_from_aggregates(self, aggregates: TripAggregates, n_samples: int) -> Optional[Dict[str, Any]]:
+        """Scores and statistics of a trip's running aggregates, or None if they don't cover it."""
+        handle = self.model_handle
+        
+        # Every sample and every window completed by them must have been added
+        n_windows = len(self._window_starts(n_samples))
+        if not aggregates.valid or aggregates.data_points != n_samples or aggregates.windows != n_windows:
+            return None
+        
+        # The whole-trip analysis would label every window with the current model
+        behavior_counts = {}
+        if handle.model is not None and n_windows:
+            if aggregates.label_version != handle.version or aggregates.labelled_windows != n_windows:
+                return None
+            behavior_counts = aggregates.behavior_counts
+        
+        event_counts = aggregates.event_totals()
+        stats = {
+            'trip_duration': (aggregates.last_timestamp - aggregates.first_timestamp) / 1000 if n_samples else 0,
+            'data_points': n_samples,
+            'event_count': sum(event_counts.values()),
+            'behavior_distribution': {behavior: count / n_windows for behavior, count in behavior_counts.items()}
+        }
+        
+        return {
+            'scores': self._scores_from_totals(event_counts, aggregates.acc_moments),
             'statistics': stats
         }
     
-    def process_realtime_data(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """Process a chunk of real-time data and return immediate feedback."""
+    def _cached_trip_windows(self, data: SensorData, cache: Optional[WindowCache],
+                             handle: ModelHandle) -> Optional[np.ndarray]:
+        """Return the window starts of data held by cache, or None if the cache cannot be used."""
+        if cache is None or not cache.valid or len(cache) == 0:
+            return None
+        if (cache.window_size, cache.step) != (self.window_size, self.window_size - self.overlap):
+            return None
+        if cache.feature_names is None or not handle.feature_plan.features.issubset(cache.feature_names):
+            return None
+        
+        starts = self._window_starts(len(data))
+        cached = starts[cache.covers(starts)]
+        
+        # The cached windows must cover the same samples as the trip data
+        timestamps = self._timestamps(data)
+        if timestamps is None or not np.array_equal(timestamps[cached + self.window_size // 2],
+                                                    cache.rows(cached)['timestamps']):
+            return None
+        return cached
+    
+    def _analyse_uncached_windows(self, data: SensorData, cache: WindowCache, cached: np.ndarray,
+                                  handle: ModelHandle) -> Tuple[List[str], np.ndarray]:
+        """Return the behaviors and events of a trip, computing only windows missing from cache."""
+        rows = cache.rows(cached)
+        timestamps = [rows['timestamps']]
+        signals = {event_type: [signal, values] for event_type, (signal, values) in rows['signals'].items()}
+        labels = [rows['labels']]
+        
+        # Windows cached before the model was available or labelled by
+        # another model version are predicted again with this one
+        stale = rows['versions'] != handle.version
+        if handle.model is not None and stale.any():
+            cached_labels = rows['labels'].copy()
+            cached_labels[stale] = self._predict_feature_matrix(cache.feature_names, rows['features'][stale], handle)
+            labels = [cached_labels]
+        
+        # The windows not analysed yet follow the cached ones
+        first_missing = len(cached) * (self.window_size - self.overlap)
+        if len(self._window_starts(len(data) - first_missing)):
+            tail = data[first_missing:] if isinstance(data, SensorBatch) else data.iloc[first_missing:]
+            windows = self.build_trip_windows(tail, handle.feature_plan)
+            features = self._feature_columns(tail, windows, handle.feature_plan)
+            timestamps.append(windows.window_timestamps())
+            tail_signals = self.event_signals(windows)
+            signals = {event_type: [np.concatenate([signal, tail_signals[event_type][0]]),
+                                    np.concatenate([values, tail_signals[event_type][1]])]
+                       for event_type, (signal, values) in signals.items() if event_type in tail_signals}
+            if handle.model is not None:
+                labels.append(np.asarray(self._predict_feature_matrix(*self._feature_matrix(features), handle),
+                                         dtype=object))
+        
+        events = self._trip_events(np.concatenate(timestamps), signals, self.window_size)
+        behaviors = np.concatenate(labels) if handle.model is not None else []
+        return behaviors, events
+    
+    def process_realtime_data(self, data: SensorData, extractor=None) -> Dict[str, Any]:
+        """Process a chunk of real-time data and return immediate feedback.
+        
+        When a per-trip RealtimeFeatureExtractor is given, data holds only the
+        newly received samples and just the windows they complete are analysed.
+        Calls sharing an extractor are serialized on its lock.
+        """
+        # One model version serves the whole analysis
+        handle = self.model_handle
+        
+        if extractor is not None:
+            with extractor.lock:
+                return self._process_realtime_windows(data, extractor, handle)
+        
+        # Small chunks skip pandas entirely
+        if len(data) <= self.fast_path_max_rows and self._supports_fast_path(data):
+            return self._process_realtime_fast(data, handle)
+        
         # Preprocess data
         processed_data = self.preprocess_data(data)
         
+        # Single pass over the windows shared by features, events and scores
+        windows = self.build_trip_windows(processed_data, handle.feature_plan)
+        
         # Extract features
-        features = self.extract_features(processed_data)
+        features = self.extract_features(processed_data, windows, handle.feature_plan)
         
         # Detect events
-        events = self.detect_events(processed_data)
+        events = self._detect_merged_events(processed_data, windows)
         
         # Calculate preliminary scores based on this chunk
-        scores = self.calculate_scores(processed_data, events)
+        scores = self.calculate_scores(processed_data, events, windows)
         
         # Predict current behavior if model is available
         current_behavior = 'UNKNOWN'
-        if self.model is not None and not features.empty:
-            behaviors = self.predict_behavior(features)
-            if behaviors:
-                # Get the most common behavior in this chunk
-                behavior_counts = {}
-                for behavior in behaviors:
-                    behavior_counts[behavior] = behavior_counts.get(behavior, 0) + 1
-                
-                current_behavior = max(behavior_counts.items(), key=lambda x: x[1])[0]
+        if handle.model is not None and not features.empty:
+            current_behavior = self._majority_behavior(self.predict_behavior(features, handle), current_behavior)
         
         return {
             'current_scores': scores,
-            'current_events': events,
+            'current_events': events_to_dict(events),
             'current_behavior': current_behavior
         }
+    
+    def _supports_fast_path(self, data: SensorData) -> bool:
+        """Whether data can go through the NumPy-only path without losing information."""
+        if isinstance(data, SensorBatch):
+            return True
+        import pandas as pd
+        
+        columns = SENSOR_COLUMNS + ['Timestamp']
+        return (all(col in data.columns for col in columns)
+                and all(pd.api.types.is_numeric_dtype(data[col]) for col in columns))
+    
+    def _process_realtime_fast(self, data: SensorData, handle: ModelHandle) -> Dict[str, Any]:
+        """NumPy-only preprocessing, features, events and scores for a small chunk."""
+        batch = data if isinstance(data, SensorBatch) else SensorBatch.from_frame(data)
+        batch = self.preprocess_data(batch)
+        
+        windows = self.build_trip_windows(batch, handle.feature_plan)
+        features = self._feature_columns(batch, windows, handle.feature_plan)
+        events = self._detect_merged_events(batch, windows)
+        scores = self.calculate_scores(batch, events, windows)
+        
+        current_behavior = 'UNKNOWN'
+        if handle.model is not None and features:
+            current_behavior = self._majority_behavior(
+                self._predict_feature_matrix(*self._feature_matrix(features), handle), current_behavior)
+        
+        return {
+            'current_scores': scores,
+            'current_events': events_to_dict(events),
+            'current_behavior': current_behavior
+        }
+    
+    def _process_realtime_windows(self, data: SensorData, extractor, handle: ModelHandle) -> Dict[str, Any]:
+        """Analyse only the windows completed by newly ingested samples."""
+        window_data = extractor.ingest(data)
+        
+        # Features and events for the new windows only; events still open at
+        # the end of the chunk are held by the extractor's merger
+        windows = self.build_trip_windows(window_data, handle.feature_plan)
+        features = self._feature_columns(window_data, windows, handle.feature_plan)
+        timestamps = windows.window_timestamps()
+        signals = self.event_signals(windows)
+        events = self._events_from_signals(timestamps, signals, self.window_size,
+                                           extractor.event_merger if self.merge_events else None)
+        
+        # Events the merger still holds open are reported and scored as they
+        # stand; only closed events reach the trip record
+        open_events = extractor.event_merger.open_events() if self.merge_events else empty_events()
+        
+        # Preliminary scores over the samples held in the extractor's ring buffer
+        # and the events of the completed windows among them
+        extractor.add_window_signals(timestamps, signals)
+        recent_timestamps, recent_signals = extractor.recent_window_signals()
+        if self.merge_events:
+            # A merger over the same windows holds the same events open
+            recent_merger = EventMerger(self.window_size, self.window_size - self.overlap)
+            recent_events = concatenate_events([recent_merger.update(recent_timestamps, recent_signals),
+                                                open_events])
+        else:
+            recent_events = self._events_from_signals(recent_timestamps, recent_signals, self.window_size)
+        scores = self.calculate_scores(extractor.recent(), recent_events)
+        
+        # Keep reporting the last known behavior until a new window completes
+        labels = None
+        if features:
+            names, matrix = self._feature_matrix(features)
+            labels = [None] * len(matrix)
+            if handle.model is not None:
+                labels = self._predict_feature_matrix(names, matrix, handle)
+                extractor.last_behavior = self._majority_behavior(labels, extractor.last_behavior)
+            
+            # Keep the window results for the analysis of the finished trip
+            extractor.window_cache.add(extractor.span_start, timestamps, names, matrix, labels, signals,
+                                       handle.version if handle.model is not None else None)
+        
+        # Running totals for the provisional scores of the trip so far
+        extractor.aggregates.add_windows(len(timestamps), events,
+                                         extractor.event_merger.open_event_types if self.merge_events else [],
+                                         labels if handle.model is not None else None, handle.version)
+        
+        current_events = events_to_dict(events, provisional=False)
+        for event_type, provisional in events_to_dict(open_events, provisional=True).items():
+            current_events[event_type].extend(provisional)
+        
+        return {
+            'current_scores': scores,
+            'current_events': current_events,
+            'current_behavior': extractor.last_behavior
+        }
+    
+    def _majority_behavior(self, behaviors, default: str) -> str:
+        """Return the most common predicted behavior, or default if there is none."""
+        if len(behaviors) == 0:
+            return default
+        
+        behavior_counts = {}
+        for behavior in behaviors:
+            behavior_counts[behavior] = behavior_counts.get(behavior, 0) + 1
+        
+        return max(behavior_counts.items(), key=lambda x: x[1])[0]
+
+def _extract_chunk_features(task: Tuple) -> Dict[str, np.ndarray]:
+    """Extract the feature columns of one chunk of a shared window series (worker process)."""
+    name, shape, columns, start, stop, shift, window_size, overlap, plan = task
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        series = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)[start:stop].copy()
+    finally:
+        memory.close()
+    
+    processor = DataProcessor(model_path='')
+    processor.window_size = window_size
+    processor.overlap = overlap
+    trip_series = TripSeries(series, columns, None, plan.moment_order, shift=shift)
+    return processor._feature_columns(None, trip_series.windows(window_size, window_size - overlap), plan)
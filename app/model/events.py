@@ -0,0 +1,168 @@
+import numpy as np
+from typing import Any, Dict, List, Tuple, Union
+
+# Event types, in the order events are reported; the 'type' field indexes this list
+EVENT_TYPES = ['harsh_acceleration', 'harsh_braking', 'harsh_cornering', 'phone_usage', 'speeding']
+
+# One row per detected event: timestamp is its start, end the time of its
+# last triggering window, value its peak and duration the samples it spans
+EVENT_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    ('end', np.int64),
+    ('value', np.float64),
+    ('duration', np.int64),
+    ('type', np.int8)
+])
+
+# Enter and exit thresholds on each event's trigger signal (larger is more severe)
+EVENT_THRESHOLDS = {
+    'harsh_acceleration': (0.5, 0.4),  # Max AccX, m/s²
+    'harsh_braking': (0.5, 0.4),       # Negated min AccX, m/s²
+    'harsh_cornering': (0.4, 0.3),     # Max |GyroZ|, rad/s
+    'phone_usage': (0.2, 0.15)         # Smallest jerk std over AccX, AccY, AccZ
+}
+
+# Events as a structured array or as the per-type lists of the JSON responses
+EventData = Union[np.ndarray, Dict[str, List[Dict[str, Any]]]]
+
+def make_events(event_type: str, timestamps: np.ndarray, values: np.ndarray, duration,
+                ends: np.ndarray = None) -> np.ndarray:
+    """Build event rows of one type from matching timestamp and value arrays.
+    
+    Events without ends last a single window and end where they start.
+    """
+    events = np.empty(len(timestamps), dtype=EVENT_DTYPE)
+    events['timestamp'] = timestamps
+    events['end'] = timestamps if ends is None else ends
+    events['value'] = values
+    events['duration'] = duration
+    events['type'] = EVENT_TYPES.index(event_type)
+    return events
+
+def empty_events() -> np.ndarray:
+    """Return an event array without rows."""
+    return np.empty(0, dtype=EVENT_DTYPE)
+
+def concatenate_events(arrays: List[np.ndarray]) -> np.ndarray:
+    """Join event arrays, keeping rows grouped by type in EVENT_TYPES order."""
+    events = np.concatenate([empty_events()] + list(arrays))
+    return events[np.argsort(events['type'], kind='stable')]
+
+def events_of_type(events: np.ndarray, event_type: str) -> np.ndarray:
+    """Return the rows of an event array with the given type."""
+    return events[events['type'] == EVENT_TYPES.index(event_type)]
+
+def event_values(events: EventData, event_type: str) -> np.ndarray:
+    """Return the values of one event type from either event format."""
+    if isinstance(events, np.ndarray):
+        return events_of_type(events, event_type)['value']
+    return np.array([event['value'] for event in events.get(event_type, [])], dtype=np.float64)
+
+def count_events(events: EventData, event_type: str) -> int:
+    """Count the events of one type in either event format."""
+    if isinstance(events, np.ndarray):
+        return int(np.count_nonzero(events['type'] == EVENT_TYPES.index(event_type)))
+    return len(events.get(event_type, []))
+
+def events_to_dict(events: np.ndarray, provisional: bool = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Convert an event array to per-type lists of event dicts for JSON responses.
+    
+    Unless provisional is None, every event is flagged with it, telling
+    events still open apart from closed ones.
+    """
+    result = {event_type: [] for event_type in EVENT_TYPES}
+    for timestamp, end, value, duration, code in events.tolist():
+        event = {
+            'timestamp': timestamp,
+            'end': end,
+            'value': value,
+            'duration': duration
+        }
+        if provisional is not None:
+            event['provisional'] = provisional
+        result[EVENT_TYPES[code]].append(event)
+    return result
+
+class EventMerger:
+    """Streaming hysteresis merger for per-window event triggers.
+    
+    With overlapping windows one manoeuvre triggers several consecutive
+    windows. An event opens when its signal rises above the enter threshold,
+    stays open while the signal is above the exit threshold, and closes once
+    min_gap consecutive windows have stayed below it. The windows in between
+    become one event: its timestamp is the first window, end the last one,
+    value the reported value at the peak of the signal and duration the
+    samples spanned. Windows are fed in trip order in any chunking; an event
+    still open at the end of a chunk is held until a later chunk or flush()
+    closes it, so chunk boundaries never split events.
+    """
+    
+    def __init__(self, window_size: int, step: int, min_gap: int = 2,
+                 thresholds: Dict[str, Tuple[float, float]] = None):
+        """Initialize the merger for a window size and step, in samples."""
+        self.window_size = window_size
+        self.step = step
+        self.min_gap = min_gap
+        self.thresholds = thresholds if thresholds is not None else EVENT_THRESHOLDS
+        self._windows_seen = 0
+        self._open: Dict[str, Dict[str, Any]] = {}
+    
+    def update(self, timestamps: np.ndarray, signals: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """Feed the next windows and return the events they closed.
+        
+        timestamps holds one timestamp per window; signals maps an event type
+        to its per-window trigger signal and reported value arrays.
+        """
+        first_window = self._windows_seen
+        closed = []
+        
+        for event_type, (signal, values) in signals.items():
+            enter, exit_ = self.thresholds[event_type]
+            event = self._open.pop(event_type, None)
+            
+            # Only windows above the exit threshold can open or extend an event
+            for k in np.flatnonzero(signal > exit_).tolist():
+                window = first_window + k
+                if event is not None and window - event['last'] <= self.min_gap:
+                    event['last'] = window
+                    event['end'] = timestamps[k]
+                    if signal[k] > event['peak']:
+                        event['peak'], event['value'] = signal[k], values[k]
+                    continue
+                
+                if event is not None:
+                    closed.append(self._finish(event_type, event))
+                    event = None
+                if signal[k] > enter:
+                    event = {'first': window, 'last': window, 'start': timestamps[k], 'end': timestamps[k],
+                             'peak': signal[k], 'value': values[k]}
+            
+            # Close an event once enough quiet windows have followed it
+            if event is not None and first_window + len(timestamps) - event['last'] > self.min_gap:
+                closed.append(self._finish(event_type, event))
+                event = None
+            if event is not None:
+                self._open[event_type] = event
+        
+        self._windows_seen += len(timestamps)
+        return concatenate_events(closed)
+    
+    @property
+    def open_event_types(self) -> List[str]:
+        """Types with an event still open, each of which flush() would return."""
+        return list(self._open)
+    
+    def open_events(self) -> np.ndarray:
+        """Return every event still open as it stands so far, keeping it open."""
+        return concatenate_events([self._finish(event_type, event) for event_type, event in self._open.items()])
+    
+    def flush(self) -> np.ndarray:
+        """Close and return every event still open, e.g. at the end of a trip."""
+        closed = self.open_events()
+        self._open = {}
+        return closed
+    
+    def _finish(self, event_type: str, event: Dict[str, Any]) -> np.ndarray:
+        """Turn an open event into a one-row event array."""
+        duration = (event['last'] - event['first']) * self.step + self.window_size
+        return make_events(event_type, [event['start']], [event['value']], duration, [event['end']])
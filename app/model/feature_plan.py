@@ -0,0 +1,146 @@
+import time
+import numpy as np
+from typing import Dict, List, Optional, Set
+
+# Motion sensor columns, in the order features are emitted
+SENSOR_COLUMNS = ['AccX', 'AccY', 'AccZ', 'GyroX', 'GyroY', 'GyroZ']
+
+# Statistics emitted per sensor axis and per magnitude series, in column order
+AXIS_STATISTICS = ['mean', 'std', 'max', 'min', 'range', 'median', 'kurtosis', 'skew', 'zero_crossings', 'p2p']
+MAGNITUDE_STATISTICS = ['mean', 'std', 'max']
+MAGNITUDE_SERIES = ['Acc_mag', 'Gyro_mag']
+
+# Version of the feature definitions; bump when extracted values change so
+# stored feature matrices are recomputed
+FEATURE_VERSION = 1
+
+# Computation family each statistic depends on
+STATISTIC_FAMILIES = {
+    'mean': 'mean',
+    'std': 'std',
+    'skew': 'skew',
+    'kurtosis': 'kurtosis',
+    'max': 'extremes',
+    'min': 'extremes',
+    'range': 'extremes',
+    'p2p': 'extremes',
+    'median': 'median',
+    'zero_crossings': 'zero_crossings'
+}
+
+def all_feature_names(columns: List[str] = None) -> List[str]:
+    """Return every feature extract_features emits for the given sensor columns."""
+    columns = SENSOR_COLUMNS if columns is None else [col for col in SENSOR_COLUMNS if col in columns]
+    names = [f'{col}_{stat}' for col in columns for stat in AXIS_STATISTICS]
+    for prefix, axes in zip(MAGNITUDE_SERIES, (SENSOR_COLUMNS[:3], SENSOR_COLUMNS[3:])):
+        if all(col in columns for col in axes):
+            names += [f'{prefix}_{stat}' for stat in MAGNITUDE_STATISTICS]
+    return names
+
+def _statistic(name: str) -> str:
+    """Return the statistic part of a feature name, e.g. 'zero_crossings'."""
+    for stat in sorted(STATISTIC_FAMILIES, key=len, reverse=True):
+        if name.endswith('_' + stat):
+            return stat
+    return ''
+
+class FeaturePlan:
+    """Minimal extraction plan for the features a classifier reads.
+
+    ``model_features`` is the column order the model expects; ``features`` is
+    the subset that has to be computed. Statistic families no requested
+    feature depends on (e.g. kurtosis, median) are skipped entirely by
+    DataProcessor.extract_features.
+    """
+
+    def __init__(self, features: Optional[List[str]] = None, model_features: Optional[List[str]] = None):
+        """Create a plan for the given feature names (all features if None)."""
+        self.model_features = list(model_features) if model_features is not None else all_feature_names()
+        self.features: Set[str] = set(features) if features is not None else set(self.model_features)
+        self.families: Set[str] = {STATISTIC_FAMILIES[_statistic(name)]
+                                   for name in self.features if _statistic(name)}
+
+    @classmethod
+    def full(cls) -> 'FeaturePlan':
+        """Plan that computes every feature."""
+        return cls()
+
+    @classmethod
+    def from_model(cls, model) -> 'FeaturePlan':
+        """Compile the plan for a fitted model.
+
+        Models fitted on a DataFrame name their inputs in feature_names_in_;
+        models fitted on arrays read the full feature frame by position. For
+        tree ensembles only the features referenced by a split are kept.
+        """
+        if model is None:
+            return cls.full()
+
+        if hasattr(model, 'feature_names_in_'):
+            model_features = list(model.feature_names_in_)
+        else:
+            model_features = all_feature_names()
+            if getattr(model, 'n_features_in_', len(model_features)) != len(model_features):
+                return cls.full()
+
+        used = model.split_features() if hasattr(model, 'split_features') else cls._split_features(model)
+        if used is None:
+            return cls(model_features, model_features)
+        return cls([model_features[i] for i in sorted(used)], model_features)
+
+    @staticmethod
+    def _split_features(model) -> Optional[Set[int]]:
+        """Indices of features used by any split of a tree or tree ensemble."""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+
+        used = set()
+        for estimator in np.ravel(estimators):
+            tree = getattr(estimator, 'tree_', None)
+            if tree is None:
+                return None
+            used.update(int(f) for f in tree.feature if f >= 0)
+        return used
+
+    def wants(self, name: str) -> bool:
+        """Whether a feature column should be emitted."""
+        return name in self.features
+
+    def needs(self, family: str) -> bool:
+        """Whether a statistic family has to be computed."""
+        return family in self.families
+
+    @property
+    def moment_order(self) -> int:
+        """Highest central moment the plan needs (0 if none)."""
+        for order, family in ((4, 'kurtosis'), (3, 'skew'), (2, 'std'), (1, 'mean')):
+            if self.needs(family):
+                return order
+        return 0
+
+    def skipped_families(self) -> List[str]:
+        """Statistic families the plan does not compute."""
+        return sorted(set(STATISTIC_FAMILIES.values()) - self.families)
+
+    def measure_savings(self, data_processor, data, repeats: int = 5) -> Dict[str, float]:
+        """Time extraction with this plan against the full plan on preprocessed data."""
+        def best_time(plan):
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                data_processor.extract_features(data, plan=plan)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        full_seconds = best_time(FeaturePlan.full())
+        plan_seconds = best_time(self)
+        return {
+            'features_planned': len(self.features),
+            'features_total': len(all_feature_names()),
+            'skipped_families': self.skipped_families(),
+            'full_seconds': full_seconds,
+            'plan_seconds': plan_seconds,
+            'saved_seconds': full_seconds - plan_seconds,
+            'saved_fraction': 1 - plan_seconds / full_seconds if full_seconds > 0 else 0.0
+        }
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from app.model.feature_plan import FEATURE_VERSION, all_feature_names
+
+class FeatureStore:
+    """On-disk cache of the feature matrices extracted from training CSVs.
+    
+    Each entry is an .npz file holding the feature matrix X, the window
+    labels y and the window timestamps of one CSV. Entries are keyed by a
+    hash of the CSV content, the window parameters and the feature version,
+    so any change to the data or to the extraction misses the cache. Once
+    the files exceed max_bytes the least recently used ones are evicted.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """Create a store in directory, keeping at most max_bytes of entries."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+    
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """SHA-256 of a file's content."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def key(self, csv_path: str, window_size: int, overlap: int) -> str:
+        """Cache key of the features of a CSV file for the given windowing."""
+        params = {
+            'csv': self.file_hash(csv_path),
+            'window_size': window_size,
+            'overlap': overlap,
+            'feature_version': FEATURE_VERSION,
+            'features': all_feature_names()
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        """Path of the entry file of a key."""
+        return os.path.join(self.directory, f'{key}.npz')
+    
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored X, y, timestamps and feature names of a key, or None on a miss."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                result = {
+                    'X': entry['X'],
+                    'y': entry['y'].astype(object),
+                    'timestamps': entry['timestamps'] if entry['has_timestamps'] else None,
+                    'feature_names': entry['feature_names'].tolist()
+                }
+        except Exception as e:
+            print(f"Error loading cached features: {e}")
+            return None
+        
+        # Mark the entry as recently used for eviction
+        os.utime(path)
+        return result
+    
+    def save(self, key: str, X: np.ndarray, y: np.ndarray, timestamps: Optional[np.ndarray],
+             feature_names: List[str]):
+        """Store the features of a key, then evict old entries beyond the size budget."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(f,
+                         X=np.asarray(X, dtype=np.float64),
+                         y=np.asarray(list(y)),
+                         timestamps=np.asarray(timestamps if timestamps is not None else []),
+                         has_timestamps=timestamps is not None,
+                         feature_names=np.asarray(feature_names, dtype=str))
+            # Readers never see a partially written entry
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error caching features: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        
+        self.evict(keep=path)
+    
+    def evict(self, keep: str = None):
+        """Delete least recently used entries until the store fits max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
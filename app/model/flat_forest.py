@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import numpy as np
+from typing import Any, Optional, Set
+
+# Node arrays of a saved FlatForest, one uncompressed .npy file each
+ARRAY_NAMES = ['feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots', 'classes']
+
+class FlatForest:
+    """A fitted tree ensemble classifier flattened into contiguous node arrays.
+
+    The nodes of every tree are concatenated into one set of arrays (split
+    feature, threshold, children, NaN direction and normalized class
+    distribution), so a batch of rows is pushed down all trees at once with
+    a few array operations per tree level instead of sklearn's input
+    validation and per-tree dispatch. Predictions reproduce sklearn's: rows
+    are compared as float32, NaN follows each split's missing-value
+    direction and tree probabilities are summed in estimator order.
+
+    save() writes the arrays as a directory of .npy files that load() maps
+    read-only, so worker processes share one copy of the model in the page
+    cache and load it in milliseconds.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 missing_left: np.ndarray, value: np.ndarray, roots: np.ndarray, depth: int,
+                 classes: np.ndarray, n_features: int):
+        """Wrap flattened node arrays; use from_model to build them from a fitted model."""
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.classes = classes
+        self.n_features = n_features
+
+    @classmethod
+    def from_model(cls, model: Any) -> Optional['FlatForest']:
+        """Export a fitted sklearn forest or decision tree classifier.
+
+        Returns None for models it cannot reproduce exactly (regressors,
+        multi-output models, anything without tree_ estimators).
+        """
+        if model is None or getattr(model, 'n_outputs_', None) != 1 or not hasattr(model, 'classes_'):
+            return None
+        estimators = getattr(model, 'estimators_', [model])
+        if not all(hasattr(estimator, 'tree_') for estimator in estimators):
+            return None
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            nodes = estimator.tree_.__getstate__()['nodes']
+            n_nodes = len(nodes)
+            is_leaf = nodes['left_child'] < 0
+            node_ids = np.arange(offset, offset + n_nodes)
+
+            # Leaves point to themselves, so every row can take the same number of steps
+            features.append(np.where(is_leaf, 0, nodes['feature']))
+            thresholds.append(nodes['threshold'])
+            lefts.append(np.where(is_leaf, node_ids, nodes['left_child'] + offset))
+            rights.append(np.where(is_leaf, node_ids, nodes['right_child'] + offset))
+            missing.append(nodes['missing_go_to_left'].astype(bool))
+
+            # Normalize as DecisionTreeClassifier.predict_proba does
+            proba = estimator.tree_.value[:, 0, :len(model.classes_)].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+            values.append(proba)
+
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(np.concatenate(features).astype(np.intp), np.concatenate(thresholds),
+                   np.concatenate(lefts).astype(np.intp), np.concatenate(rights).astype(np.intp),
+                   np.concatenate(missing), np.concatenate(values), np.array(roots, dtype=np.intp),
+                   max(estimator.tree_.max_depth for estimator in estimators),
+                   np.asarray(model.classes_), int(model.n_features_in_))
+
+    def save(self, directory: str):
+        """Write the forest to directory as uncompressed .npy arrays plus metadata.
+
+        The bundle is written next to directory and then renamed into place;
+        an existing bundle is renamed aside first and deleted afterwards, so
+        readers never see a partial bundle and the gap without one is a
+        single rename.
+        """
+        temp_directory = f'{directory}.{os.getpid()}.tmp'
+        os.makedirs(temp_directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            array = getattr(self, name)
+            if name == 'classes':
+                # Object arrays would be pickled and could not be mapped
+                array = np.asarray(array.tolist())
+            np.save(os.path.join(temp_directory, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+        with open(os.path.join(temp_directory, 'meta.json'), 'w') as f:
+            json.dump({'depth': self.depth, 'n_features': self.n_features}, f)
+
+        old_directory = None
+        if os.path.exists(directory):
+            old_directory = f'{directory}.{os.getpid()}.old'
+            os.replace(directory, old_directory)
+        os.replace(temp_directory, directory)
+        if old_directory is not None:
+            shutil.rmtree(old_directory)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'FlatForest':
+        """Load a forest written by save(), memory-mapping its arrays by default."""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in ARRAY_NAMES}
+        return cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+                   arrays['missing_left'], arrays['value'], arrays['roots'], meta['depth'],
+                   arrays['classes'], meta['n_features'])
+
+    @property
+    def n_trees(self) -> int:
+        """Number of trees in the forest."""
+        return len(self.roots)
+
+    @property
+    def n_features_in_(self) -> int:
+        """Number of input features, named as on sklearn estimators."""
+        return self.n_features
+
+    def split_features(self) -> Set[int]:
+        """Indices of the features used by any split."""
+        is_split = self.left != np.arange(len(self.left))
+        return set(np.unique(self.feature[is_split]).tolist())
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf index of every row in every tree, shaped (row, tree)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got array of shape {X.shape}")
+        if np.isinf(X).any():
+            raise ValueError("Input contains infinity or a value too large for dtype('float32')")
+
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Mean class probabilities over the trees, shaped (row, class)."""
+        proba = self.value[self.apply(X)]
+        # Sum sequentially in tree order, as sklearn accumulates tree predictions
+        return np.cumsum(proba, axis=1)[:, -1] / self.n_trees
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicted class of every row."""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+class InferenceBatcher:
+    """Collects feature rows from concurrent callers into shared predict calls.
+
+    Every submit() queues a (row x feature) matrix and returns a Future. A
+    worker thread takes the oldest pending request, waits up to max_wait_ms
+    for more, stacks up to max_batch_rows rows into one predict call and
+    hands each caller its own slice. Requests are answered in submission
+    order and never split across batches, so the windows of one trip stay
+    in order. Only requests with the same key (e.g. the model version their
+    rows were prepared for) share a batch.
+    """
+
+    def __init__(self, predict: Callable[[np.ndarray, Any], np.ndarray], max_batch_rows: int = 256,
+                 max_wait_ms: float = 2.0):
+        """Batch calls of predict(X, key), returning one label per row of X."""
+        self.predict_rows = predict
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+        self._queue: 'queue.Queue[Tuple[np.ndarray, Any, Future]]' = queue.Queue()
+        self._carry: Optional[Tuple[np.ndarray, Any, Future]] = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, X: np.ndarray, key: Any = None) -> Future:
+        """Queue a feature matrix; the Future resolves to its predicted labels."""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((np.asarray(X), key, future))
+        return future
+
+    def predict(self, X: np.ndarray, key: Any = None) -> np.ndarray:
+        """Predict a feature matrix as part of the next batch, blocking until it is done."""
+        return self.submit(X, key).result()
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Worker loop: collect a batch, predict it, resolve its futures."""
+        while True:
+            batch = self._collect()
+            try:
+                labels = self.predict_rows(np.concatenate([X for X, _, _ in batch]), batch[0][1])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for X, _, future in batch:
+                future.set_result(labels[offset:offset + len(X)])
+                offset += len(X)
+
+    def _collect(self) -> List[Tuple[np.ndarray, Any, Future]]:
+        """Block for the next request, then gather more until the batch is full or the wait is over."""
+        first = self._carry if self._carry is not None else self._queue.get()
+        self._carry = None
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            # A request that does not fit, or is for another key, opens the next batch
+            if rows + len(request[0]) > self.max_batch_rows or request[1] is not first[1]:
+                self._carry = request
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
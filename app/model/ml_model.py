@@ -1,66 +1,144 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
-from typing import Tuple, Dict, Any
+from typing import TYPE_CHECKING, Tuple, Dict, Any, Optional
 
 from app.model.data_processor import DataProcessor
+from app.model.feature_plan import SENSOR_COLUMNS
+from app.model.feature_store import FeatureStore
+from app.model.model_registry import model_registry
+from app.model.serving import export_serving_model
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class DriverBehaviorModel:
-    def __init__(self, model_path: str = 'app/model/trained_models/driver_model.pkl'):
-        """Initialize the driver behavior model."""
+    def __init__(self, model_path: str = 'app/model/trained_models/driver_model.pkl',
+                 use_feature_cache: bool = True):
+        """Initialize the driver behavior model.
+        
+        Unless use_feature_cache is False, extracted training and test
+        features are cached in a feature_cache directory inside the model's.
+        """
         self.model_path = model_path
         self.model = None
         self.scaler = None
-        self.data_processor = DataProcessor()
+        self.data_processor = DataProcessor(model_path)
+        
+        self.feature_store = None
+        if use_feature_cache:
+            model_dir = os.path.dirname(os.path.abspath(model_path))
+            self.feature_store = FeatureStore(os.path.join(model_dir, 'feature_cache'))
         
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
     
-    def train(self, train_data_path: str) -> Dict[str, Any]:
-        """Train the model using the provided training data."""
-        # Load and preprocess training data
-        train_data = pd.read_csv(train_data_path)
-        processed_data = self.data_processor.preprocess_data(train_data)
-        
-        # Extract features
-        features_df = self.data_processor.extract_features(processed_data)
+    def load_dataset(self, data_path: str, workers: int = 1, name: str = 'training',
+                     chunk_rows: int = None) -> Dict[str, Any]:
+        """Return the feature matrix X and window labels y of a labelled CSV file.
+        
+        Features are read from the feature store when the file was extracted
+        before with the same windowing; otherwise the CSV is parsed,
+        preprocessed and extracted (on workers processes when more than one
+        is given) and the result is stored. With chunk_rows the CSV is
+        streamed in chunks of that many rows (see extract_chunked). name
+        labels error messages.
+        """
+        import pandas as pd
+        
+        window_size = self.data_processor.window_size
+        overlap = self.data_processor.overlap
+        key = self.feature_store.key(data_path, window_size, overlap) if self.feature_store else None
+        cached = self.feature_store.load(key) if key else None
+        if cached is not None:
+            return {'X': pd.DataFrame(cached['X'], columns=cached['feature_names']), 'y': cached['y']}
+        
+        if chunk_rows:
+            features_df, y = self.extract_chunked(data_path, chunk_rows, workers)
+        else:
+            # Load and preprocess data
+            raw_data = pd.read_csv(data_path)
+            processed_data = self.data_processor.preprocess_data(raw_data)
+            
+            # Extract features
+            features_df = self.data_processor.extract_features_parallel(processed_data, workers=workers)
+            
+            # If Class column exists in original data, label each feature window with its most common class
+            y = self.data_processor.window_labels(processed_data) if 'Class' in processed_data.columns else None
         
         if features_df.empty:
-            return {"error": "Failed to extract features from training data"}
+            return {"error": f"Failed to extract features from {name} data"}
         
         # Prepare features and target
         X = features_df.drop(['Timestamp'], axis=1, errors='ignore')
         
-        # If Class column exists in original data, map it to the features
-        if 'Class' in processed_data.columns:
-            # For each feature window, get the most common class in that window
-            y = []
-            window_size = self.data_processor.window_size
-            overlap = self.data_processor.overlap
+        if y is None:
+            return {"error": f"{name.capitalize()} data does not contain Class labels"}
+        
+        if key:
+            timestamps = features_df['Timestamp'].to_numpy() if 'Timestamp' in features_df.columns else None
+            self.feature_store.save(key, X.to_numpy(), y, timestamps, list(X.columns))
+        return {'X': X, 'y': y}
+    
+    def extract_chunked(self, data_path: str, chunk_rows: int,
+                        workers: int = 1) -> Tuple['pd.DataFrame', Optional[np.ndarray]]:
+        """Extract the features and window labels of a CSV file too large to load at once.
+        
+        The CSV is read chunk_rows rows at a time with fixed dtypes. Samples
+        after the last complete window of a chunk (fewer than window_size)
+        are carried over to the next one, so windows line up with whole-file
+        extraction and none are lost; only the feature rows are kept. Rows
+        must already be in timestamp order, since sorting and gap filling
+        only reach across one carried tail. Labels are None without a Class
+        column.
+        """
+        import pandas as pd
+        
+        window_size = self.data_processor.window_size
+        step = window_size - self.data_processor.overlap
+        dtypes = {col: np.float64 for col in SENSOR_COLUMNS}
+        dtypes['Class'] = str
+        
+        blocks, label_blocks = [], []
+        has_labels = None
+        tail = None
+        for chunk in pd.read_csv(data_path, chunksize=chunk_rows, dtype=dtypes):
+            if has_labels is None:
+                has_labels = 'Class' in chunk.columns
+            data = chunk if tail is None else pd.concat([tail, chunk], ignore_index=True)
+            processed_data = self.data_processor.preprocess_data(data)
             
-            for i in range(0, len(processed_data) - window_size + 1, window_size - overlap):
-                window = processed_data.iloc[i:i + window_size]
-                if len(window) < window_size:
-                    continue
-                
-                # Get most common class in this window
-                class_counts = window['Class'].value_counts()
-                most_common_class = class_counts.index[0] if not class_counts.empty else 'UNKNOWN'
-                y.append(most_common_class)
+            features = self.data_processor.extract_features_parallel(processed_data, workers=workers)
+            if not features.empty:
+                blocks.append(features)
+                if has_labels:
+                    label_blocks.append(self.data_processor.window_labels(processed_data))
             
-            # Ensure X and y have the same length
-            if len(y) != len(X):
-                # Truncate the longer one
-                min_len = min(len(X), len(y))
-                X = X.iloc[:min_len]
-                y = y[:min_len]
-        else:
-            return {"error": "Training data does not contain Class labels"}
+            # Carry the samples from the next window start on
+            tail = processed_data.iloc[len(features) * step:]
+        
+        if not blocks:
+            return pd.DataFrame(), None
+        labels = np.concatenate(label_blocks) if has_labels else None
+        return pd.concat(blocks, ignore_index=True), labels
+    
+    def train(self, train_data_path: str, workers: int = 1, chunk_rows: int = None) -> Dict[str, Any]:
+        """Train the model using the provided training data.
+        
+        Features are extracted on workers processes when more than one is
+        given, streaming the CSV in chunk_rows-row chunks if set.
+        """
+        # Imported on first use to keep application startup light
+        import joblib
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import classification_report, accuracy_score
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
+        # Load features and window labels, from the feature store if possible
+        dataset = self.load_dataset(train_data_path, workers, 'training', chunk_rows)
+        if 'error' in dataset:
+            return dataset
+        X, y = dataset['X'], dataset['y']
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -86,14 +164,21 @@ class DriverBehaviorModel:
         scaler_path = os.path.join(os.path.dirname(self.model_path), 'scaler.pkl')
         joblib.dump(self.scaler, scaler_path)
         
+        # Save the serving artifact, which takes unscaled features, and serve it
+        serving_path = export_serving_model(self.model, self.scaler, self.model_path)
+        model_registry.reload(self.model_path)
+        
         return {
             "accuracy": accuracy,
             "classification_report": report,
-            "model_path": self.model_path
+            "model_path": self.model_path,
+            "serving_model_path": serving_path
         }
     
     def load(self) -> bool:
         """Load the trained model from disk."""
+        import joblib
+        
         try:
             if os.path.exists(self.model_path):
                 self.model = joblib.load(self.model_path)
@@ -109,50 +194,22 @@ class DriverBehaviorModel:
             print(f"Error loading model: {e}")
             return False
     
-    def evaluate(self, test_data_path: str) -> Dict[str, Any]:
-        """Evaluate the model using test data."""
+    def evaluate(self, test_data_path: str, workers: int = 1, chunk_rows: int = None) -> Dict[str, Any]:
+        """Evaluate the model using test data.
+        
+        Features are extracted as in train.
+        """
+        from sklearn.metrics import classification_report, accuracy_score
+        
         if self.model is None:
             if not self.load():
                 return {"error": "Model not loaded"}
         
-        # Load and preprocess test data
-        test_data = pd.read_csv(test_data_path)
-        processed_data = self.data_processor.preprocess_data(test_data)
-        
-        # Extract features
-        features_df = self.data_processor.extract_features(processed_data)
-        
-        if features_df.empty:
-            return {"error": "Failed to extract features from test data"}
-        
-        # Prepare features and target
-        X = features_df.drop(['Timestamp'], axis=1, errors='ignore')
-        
-        # If Class column exists in original data, map it to the features
-        if 'Class' in processed_data.columns:
-            # For each feature window, get the most common class in that window
-            y = []
-            window_size = self.data_processor.window_size
-            overlap = self.data_processor.overlap
-            
-            for i in range(0, len(processed_data) - window_size + 1, window_size - overlap):
-                window = processed_data.iloc[i:i + window_size]
-                if len(window) < window_size:
-                    continue
-                
-                # Get most common class in this window
-                class_counts = window['Class'].value_counts()
-                most_common_class = class_counts.index[0] if not class_counts.empty else 'UNKNOWN'
-                y.append(most_common_class)
-            
-            # Ensure X and y have the same length
-            if len(y) != len(X):
-                # Truncate the longer one
-                min_len = min(len(X), len(y))
-                X = X.iloc[:min_len]
-                y = y[:min_len]
-        else:
-            return {"error": "Test data does not contain Class labels"}
+        # Load features and window labels, from the feature store if possible
+        dataset = self.load_dataset(test_data_path, workers, 'test', chunk_rows)
+        if 'error' in dataset:
+            return dataset
+        X, y = dataset['X'], dataset['y']
         
         # Scale features if scaler exists
         if self.scaler is not None:
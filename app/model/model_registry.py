@@ -0,0 +1,120 @@
+import os
+import threading
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.model.feature_plan import FeaturePlan
+from app.model.flat_forest import FlatForest
+from app.model.serving import flat_bundle_path, fold_scaler, scaler_path, serving_model_path
+
+class ModelHandle(NamedTuple):
+    """One loaded version of a model artifact, shared read-only by every user.
+
+    model is the serving form of the model (taking unscaled features) or
+    None if no model is available; feature_plan and flat_model are derived
+    from it once per version.
+    """
+    path: str
+    version: int
+    model: Any
+    feature_plan: FeaturePlan
+    flat_model: Optional[FlatForest]
+
+class ModelRegistry:
+    """Process-wide, versioned cache of loaded models keyed by artifact path.
+
+    Every artifact is loaded once and handed out as an immutable ModelHandle.
+    reload() loads a new version next to the current one and then swaps the
+    handle in a single assignment: callers holding the old handle finish
+    with it undisturbed, later lookups get the new one.
+
+    With prefer_mapped, a current FlatForest bundle exported next to the
+    model is memory-mapped instead of unpickling the sklearn model, so
+    worker processes share its pages and start in milliseconds.
+    """
+
+    def __init__(self, prefer_mapped: bool = False):
+        """Create an empty registry."""
+        self.prefer_mapped = prefer_mapped
+        self._handles: Dict[str, ModelHandle] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path: str) -> ModelHandle:
+        """Return the current handle of a model artifact, loading it on first use."""
+        key = self._key(model_path)
+        handle = self._handles.get(key)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is None:
+                    handle = self._load(key, 1)
+                    self._handles[key] = handle
+        return handle
+
+    def reload(self, model_path: str) -> ModelHandle:
+        """Load the artifact again, e.g. after training, and make it the current version."""
+        key = self._key(model_path)
+        with self._lock:
+            current = self._handles.get(key)
+            handle = self._load(key, current.version + 1 if current is not None else 1)
+            self._handles[key] = handle
+        return handle
+
+    @staticmethod
+    def _key(model_path: str) -> str:
+        """Registry key of a model path; empty paths mean no model."""
+        return os.path.abspath(model_path) if model_path else ''
+
+    def _load(self, path: str, version: int) -> ModelHandle:
+        """Load a model version and derive what serving needs from it."""
+        if not path or not os.path.isfile(path):
+            return ModelHandle(path, version, None, FeaturePlan.from_model(None), None)
+
+        if self.prefer_mapped:
+            flat_model = self._load_mapped(path)
+            if flat_model is not None:
+                return ModelHandle(path, version, flat_model, FeaturePlan.from_model(flat_model), flat_model)
+
+        model = self._load_model(path)
+        return ModelHandle(path, version, model, FeaturePlan.from_model(model), FlatForest.from_model(model))
+
+    @staticmethod
+    def _load_mapped(model_path: str) -> Optional[FlatForest]:
+        """Map the FlatForest bundle of a model, or None if there is no bundle as new as the model."""
+        bundle = flat_bundle_path(model_path)
+        meta_path = os.path.join(bundle, 'meta.json')
+        if not os.path.exists(meta_path) or os.path.getmtime(meta_path) < os.path.getmtime(model_path):
+            return None
+        try:
+            return FlatForest.load(bundle)
+        except Exception as e:
+            print(f"Error loading mapped model: {e}")
+            return None
+
+    @staticmethod
+    def _load_model(model_path: str):
+        """Load the trained model from disk, in the form that reads unscaled features.
+
+        The serving artifact exported at training time is preferred unless it
+        is older than the model. Otherwise a saved scaler is folded into the
+        model's trees on load.
+        """
+        import joblib
+
+        try:
+            serving_path = serving_model_path(model_path)
+            if os.path.exists(serving_path) and os.path.getmtime(serving_path) >= os.path.getmtime(model_path):
+                return joblib.load(serving_path)
+
+            model = joblib.load(model_path)
+            if os.path.exists(scaler_path(model_path)):
+                folded = fold_scaler(model, joblib.load(scaler_path(model_path)))
+                if folded is not None:
+                    return folded
+                print("Warning: model is served without its feature scaler")
+            return model
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            return None
+
+# Registry shared by every DataProcessor of the process
+model_registry = ModelRegistry()
@@ -0,0 +1,330 @@
+import numpy as np
+from typing import Dict, List
+
+# Samples per prefix-sum segment of a MomentAccumulator
+DEFAULT_SEGMENT_LENGTH = 4096
+
+# Windows whose squared mean offset from the shift exceeds this multiple of
+# their variance lose their higher moments to cancellation in the power sums
+RECENTER_RATIO = 1e3
+
+# Samples gathered at once when recomputing such windows directly
+RECENTER_BATCH_VALUES = 1 << 22
+
+class MomentAccumulator:
+    """Prefix power sums over a (sample x axis) array for O(1) window moments.
+
+    Sums of the first four powers are accumulated once per sample, after which
+    the mean, standard deviation, skewness and kurtosis of any window are read
+    off from two prefix lookups. Skewness and kurtosis are the biased (Fisher)
+    estimates, matching ``scipy.stats.skew`` and ``scipy.stats.kurtosis``.
+
+    Prefix sums restart every ``segment_length`` samples so rounding error is
+    bounded by the segment rather than by the length of the trip; windows
+    longer than a segment add the totals of the segments they cover. A slice of
+    the series that starts on a segment boundary and is centered on the same
+    shift yields bit-identical window moments, so long series can be split
+    into chunks that are accumulated independently.
+
+    Windows whose mean lies far from the shift relative to their spread (a
+    phone re-oriented mid-trip moves gravity to another axis) would lose
+    their higher moments to cancellation; their moments are computed
+    directly around the window mean instead.
+    """
+
+    def __init__(self, values: np.ndarray, segment_length: int = DEFAULT_SEGMENT_LENGTH, max_order: int = 4,
+                 shift: np.ndarray = None):
+        """Accumulate power sums up to max_order of a 1-D or 2-D sample array.
+
+        Values are centered on shift, by default their own centering().
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+
+        self.values = values
+        self.n_samples, self.n_axes = values.shape
+        # Short series fit in a single segment; don't pad them to a full one
+        self.segment_length = max(1, min(segment_length, self.n_samples))
+        self.max_order = max_order
+
+        # Windows containing NaN yield NaN, as the per-window reductions do
+        nan_mask = np.isnan(values)
+        self._nan_counts = self._prefix_counts(nan_mask)
+
+        # Constant windows have undefined skew/kurtosis; detect them exactly
+        changes = np.zeros_like(nan_mask)
+        changes[1:] = values[1:] != values[:-1]
+        self._change_counts = self._prefix_counts(changes)
+
+        # Center on the series mean to keep the power sums well conditioned
+        self.shift = self.centering(values) if shift is None else np.asarray(shift, dtype=np.float64)
+        centered = np.where(nan_mask, 0.0, values - self.shift)
+
+        self._local_sums, self._segment_totals = self._segmented_prefix_sums(centered)
+
+        # Exclusive prefix sums of whole segments, for windows spanning several
+        self._segment_prefix = np.zeros((max_order, len(self._segment_totals[0]) + 1, self.n_axes))
+        np.cumsum(self._segment_totals, axis=1, out=self._segment_prefix[:, 1:])
+
+    @staticmethod
+    def centering(values: np.ndarray) -> np.ndarray:
+        """Per-axis mean of the non-NaN samples of a 1-D or 2-D array (zero if none)."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        nan_mask = np.isnan(values)
+        finite = np.where(nan_mask, 0.0, values)
+        return finite.sum(axis=0) / np.maximum((~nan_mask).sum(axis=0), 1)
+
+    def _prefix_counts(self, mask: np.ndarray) -> np.ndarray:
+        """Exclusive prefix counts of a boolean (sample x axis) mask."""
+        counts = np.zeros((self.n_samples + 1, self.n_axes), dtype=np.int64)
+        np.cumsum(mask, axis=0, out=counts[1:])
+        return counts
+
+    def _segmented_prefix_sums(self, centered: np.ndarray):
+        """Inclusive power-sum prefixes that restart at every segment boundary."""
+        length = self.segment_length
+        n_segments = self.n_samples // length + 1
+        order = self.max_order
+        sums = np.zeros((order, n_segments * length, self.n_axes))
+        sums[0, :self.n_samples] = centered
+        for p in range(1, order):
+            np.multiply(sums[p - 1], sums[0], out=sums[p])
+
+        segments = sums.reshape(order, n_segments, length, self.n_axes)
+        np.cumsum(segments, axis=2, out=segments)
+        return sums, segments[:, :, -1]
+
+    def _exclusive_sums(self, index: np.ndarray) -> np.ndarray:
+        """Power sums from the start of each index's segment up to (excluding) it."""
+        sums = self._local_sums[:, index - 1]
+        sums[:, index % self.segment_length == 0] = 0.0
+        return sums
+
+    def _window_sums(self, starts: np.ndarray, window_size: int) -> np.ndarray:
+        """Power sums of every window, shaped (power, window, axis)."""
+        ends = starts + window_size
+        sums = self._exclusive_sums(ends) - self._exclusive_sums(starts)
+
+        # Windows crossing a segment boundary add the rest of the first segment
+        first_segment = starts // self.segment_length
+        last_segment = ends // self.segment_length
+        crossing = last_segment != first_segment
+        if crossing.any():
+            sums[:, crossing] += self._segment_totals[:, first_segment[crossing]]
+
+        # and windows longer than a segment the whole segments in between
+        spanning = last_segment - first_segment > 1
+        if spanning.any():
+            sums[:, spanning] += (self._segment_prefix[:, last_segment[spanning]]
+                                  - self._segment_prefix[:, first_segment[spanning] + 1])
+        return sums
+
+    def window_moments(self, starts: np.ndarray, window_size: int) -> Dict[str, np.ndarray]:
+        """Return mean, std, skew and kurtosis arrays shaped (window, axis).
+
+        Only the moments allowed by max_order are returned.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = starts + window_size
+        sums = self._window_sums(starts, window_size) / window_size
+        has_nan = (self._nan_counts[ends] - self._nan_counts[starts]) > 0
+
+        mu = sums[0]
+        if self.max_order < 2:
+            return {'mean': np.where(has_nan, np.nan, mu + self.shift)}
+
+        # Central moments from the power sums around the shift
+        central = [mu + self.shift, np.maximum(sums[1] - mu ** 2, 0.0)]
+        if self.max_order >= 3:
+            central.append(sums[2] - 3 * mu * sums[1] + 2 * mu ** 3)
+        if self.max_order >= 4:
+            central.append(sums[3] - 4 * mu * sums[2] + 6 * mu ** 2 * sums[1] - 3 * mu ** 4)
+
+        constant = (self._change_counts[ends] - self._change_counts[starts + 1]) == 0
+        recenter = (mu ** 2 > RECENTER_RATIO * central[1]) & ~constant & ~has_nan
+        if recenter.any():
+            self._direct_moments(starts, window_size, recenter, central)
+
+        mean, m2 = central[0], central[1]
+        moments = {'mean': np.where(has_nan, np.nan, mean)}
+        std = np.sqrt(m2)
+        std[constant] = 0.0
+        moments['std'] = np.where(has_nan, np.nan, std)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.max_order >= 3:
+                moments['skew'] = np.where(constant | has_nan, np.nan, central[2] / m2 ** 1.5)
+            if self.max_order >= 4:
+                moments['kurtosis'] = np.where(constant | has_nan, np.nan, central[3] / m2 ** 2 - 3.0)
+
+        return moments
+
+    def _direct_moments(self, starts: np.ndarray, window_size: int, mask: np.ndarray,
+                        central: List[np.ndarray]):
+        """Overwrite the mean and central moments of the masked (window, axis) pairs with two-pass values."""
+        windows, axes = np.nonzero(mask)
+        batch = max(1, RECENTER_BATCH_VALUES // window_size)
+        for first in range(0, len(windows), batch):
+            rows, cols = windows[first:first + batch], axes[first:first + batch]
+            x = self.values[starts[rows, np.newaxis] + np.arange(window_size), cols[:, np.newaxis]]
+            mean = x.mean(axis=1)
+            centered = x - mean[:, np.newaxis]
+            central[0][rows, cols] = mean
+            for p in range(2, len(central) + 1):
+                central[p - 1][rows, cols] = (centered ** p).mean(axis=1)
+
+
+class RunningMoments:
+    """Streaming first-to-fourth central moments per axis.
+
+    Batches are folded in with the pairwise update of Chan et al. / Pebay,
+    so samples can be added in any chunking at O(1) amortized cost and two
+    accumulators can be merged. With one sample per batch this reduces to
+    Welford's algorithm.
+    """
+
+    def __init__(self, n_axes: int = 1):
+        """Initialize an empty accumulator for n_axes columns."""
+        self.count = 0
+        self.mean = np.zeros(n_axes)
+        self.m2 = np.zeros(n_axes)
+        self.m3 = np.zeros(n_axes)
+        self.m4 = np.zeros(n_axes)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> 'RunningMoments':
+        """Build an accumulator from a 1-D or 2-D sample array."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        moments = cls(values.shape[1])
+        moments.update(values)
+        return moments
+
+    def update(self, values: np.ndarray):
+        """Add a batch of samples shaped (sample x axis)."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        if len(values) == 0:
+            return
+
+        batch = RunningMoments(values.shape[1])
+        batch.count = len(values)
+        batch.mean = values.mean(axis=0)
+        centered = values - batch.mean
+        squared = centered ** 2
+        batch.m2 = squared.sum(axis=0)
+        batch.m3 = (squared * centered).sum(axis=0)
+        batch.m4 = (squared ** 2).sum(axis=0)
+        self.merge(batch)
+
+    def merge(self, other: 'RunningMoments'):
+        """Fold another accumulator into this one."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count = other.count
+            self.mean, self.m2, self.m3, self.m4 = (other.mean.copy(), other.m2.copy(),
+                                                   other.m3.copy(), other.m4.copy())
+            return
+
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+
+        m4 = (self.m4 + other.m4
+              + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+              + 6 * delta_n ** 2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+              + 4 * delta_n * (n_a * other.m3 - n_b * self.m3))
+        m3 = (self.m3 + other.m3
+              + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+              + 3 * delta_n * (n_a * other.m2 - n_b * self.m2))
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+
+        self.count = n
+        self.mean = self.mean + delta_n * n_b
+        self.m2, self.m3, self.m4 = m2, m3, m4
+
+    @property
+    def std(self) -> np.ndarray:
+        """Population standard deviation, as np.std computes it."""
+        if self.count == 0:
+            return np.full_like(self.m2, np.nan)
+        return np.sqrt(self.m2 / self.count)
+
+    @property
+    def skew(self) -> np.ndarray:
+        """Biased sample skewness."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.count) * self.m3 / self.m2 ** 1.5
+
+    @property
+    def kurtosis(self) -> np.ndarray:
+        """Biased Fisher kurtosis."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.count * self.m4 / self.m2 ** 2 - 3.0
+
+
+def _exclusive_prefix_sums(values: np.ndarray) -> np.ndarray:
+    """Prefix sums along axis 0 with a leading row of zeros."""
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:], dtype=np.result_type(values, np.int64))
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix
+
+
+class SignChangeCounts:
+    """Prefix counts of sign changes between consecutive samples.
+    
+    Changes are marked once over the whole series; the zero-crossing count
+    of any window is then the difference of two prefix counts.
+    """
+    
+    def __init__(self, values: np.ndarray):
+        """Count sign changes of a 1-D or 2-D sample array."""
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        
+        signs = np.signbit(values)
+        self._counts = _exclusive_prefix_sums(signs[1:] != signs[:-1])
+    
+    def window_counts(self, starts: np.ndarray, window_size: int) -> np.ndarray:
+        """Sign changes inside every window, shaped (window, axis)."""
+        # Change i lies between samples i and i + 1
+        starts = np.asarray(starts, dtype=np.int64)
+        return self._counts[starts + window_size - 1] - self._counts[starts]
+
+
+class DifferenceSums:
+    """Prefix sums of squared first differences, for O(1) window variances.
+    
+    The differences of a window telescope, so their sum is read from the
+    window's end points; sums of squares come from one prefix sum. Windows
+    containing NaN yield NaN.
+    """
+    
+    def __init__(self, values: np.ndarray):
+        """Accumulate the squared differences of a 1-D or 2-D sample array."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        
+        self.values = values
+        diffs = np.diff(values, axis=0)
+        missing = np.isnan(diffs)
+        self._squares = _exclusive_prefix_sums(np.where(missing, 0.0, diffs ** 2))
+        self._nan_counts = _exclusive_prefix_sums(missing)
+    
+    def window_variance(self, starts: np.ndarray, window_size: int) -> np.ndarray:
+        """Population variance of the differences inside every window, shaped (window, axis)."""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = starts + window_size - 1
+        n = window_size - 1
+        mean = (self.values[ends] - self.values[starts]) / n
+        variance = np.maximum((self._squares[ends] - self._squares[starts]) / n - mean ** 2, 0.0)
+        return np.where(self._nan_counts[ends] - self._nan_counts[starts] > 0, np.nan, variance)
@@ -0,0 +1,146 @@
+import threading
+import numpy as np
+from typing import Dict, Tuple
+
+from app.model.events import EventMerger
+from app.model.feature_plan import SENSOR_COLUMNS
+from app.model.sensor_batch import SensorBatch
+from app.model.trip_aggregates import TripAggregates
+from app.model.window_cache import WindowCache
+
+class RealtimeFeatureExtractor:
+    """Stateful per-trip window tracker for live data.
+
+    Keeps the most recent samples of a trip in a fixed-size ring buffer and,
+    on every ingest, hands back only the samples spanning windows that the new
+    data completed. Window starts are global to the trip (multiples of
+    ``window_size - overlap``), so live windows line up with the windows of a
+    full-trip analysis.
+
+    An extractor is not safe for concurrent ingests; callers hold its
+    reentrant lock around ingest and the analysis of the returned windows.
+    """
+
+    def __init__(self, data_processor, capacity: int = 100):
+        """Initialize the extractor for a data processor's window settings."""
+        self.data_processor = data_processor
+        self.window_size = data_processor.window_size
+        self.step = data_processor.window_size - data_processor.overlap
+
+        # The ring must at least hold the partial window carried between ingests
+        self.capacity = max(capacity, self.window_size)
+        self._values = np.zeros((self.capacity, len(SENSOR_COLUMNS)), dtype=np.float32)
+        self._timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self._count = 0        # Total samples seen for the trip
+        self._next_start = 0   # Trip-global index of the next window to complete
+
+        self.last_behavior = 'UNKNOWN'
+        
+        # Events still open at the end of a chunk carry over to the next one
+        self.event_merger = EventMerger(self.window_size, self.step)
+
+        # Window results kept for the analysis of the finished trip
+        self.window_cache = WindowCache(self.window_size, self.step)
+        self.span_start = 0    # Trip-global index of the first sample of the last span
+
+        # Trigger signals of the completed windows still inside the ring buffer
+        self._window_starts = np.zeros(0, dtype=np.int64)
+        self._window_timestamps = np.zeros(0, dtype=np.int64)
+        self._window_signals: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        # Running totals behind the provisional scores of the trip so far
+        self.aggregates = TripAggregates()
+
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Number of samples currently held in the ring buffer."""
+        return min(self._count, self.capacity)
+
+    def _tail(self, n: int) -> SensorBatch:
+        """Return the last n buffered samples in arrival order."""
+        idx = np.arange(self._count - max(n, 0), self._count) % self.capacity
+        return SensorBatch(self._values[idx], self._timestamps[idx])
+
+    def _write(self, batch: SensorBatch):
+        """Append samples to the ring, overwriting the oldest ones."""
+        end = self._count + len(batch)
+        batch = batch[-self.capacity:]
+        idx = np.arange(end - len(batch), end) % self.capacity
+        self._values[idx] = batch.values
+        self._timestamps[idx] = batch.timestamps
+
+    def ingest(self, data) -> SensorBatch:
+        """Add new samples and return the samples of the windows they completed.
+
+        data may be a DataFrame or a SensorBatch. The returned batch starts at
+        the first newly completed window and ends with the last one, so
+        windowing it with the processor's settings yields exactly the new
+        windows. It is empty when no window was completed.
+        """
+        # Whole-trip preprocessing would refill or reorder these samples differently
+        missing = np.isnan(data.values) if isinstance(data, SensorBatch) else data.isna().to_numpy()
+        if missing.any():
+            self.window_cache.invalidate()
+            self.aggregates.invalidate()
+
+        data = self.data_processor.preprocess_data(data)
+        if not isinstance(data, SensorBatch):
+            data = SensorBatch.from_frame(data)
+
+        if len(data) and self._count and data.timestamps[0] < self._timestamps[(self._count - 1) % self.capacity]:
+            self.window_cache.invalidate()
+            self.aggregates.invalidate()
+        self.aggregates.add_samples(data)
+
+        total = self._count + len(data)
+        if total >= self._next_start + self.window_size:
+            n_complete = (total - self.window_size - self._next_start) // self.step + 1
+        else:
+            n_complete = 0
+
+        span = SensorBatch()
+        if n_complete:
+            span_length = (n_complete - 1) * self.step + self.window_size
+            carried = self._tail(self._count - self._next_start)
+            span = SensorBatch.concatenate([carried, data])[:span_length]
+
+        self.span_start = self._next_start
+        self._write(data)
+        self._count = total
+        self._next_start += n_complete * self.step
+
+        return span
+
+    def recent(self) -> SensorBatch:
+        """Return the buffered samples in arrival order."""
+        return self._tail(len(self))
+
+    def add_window_signals(self, timestamps: np.ndarray, signals: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """Keep the trigger signals of the windows completed by the last ingest.
+
+        Only windows lying wholly inside the ring buffer are kept, so the
+        signals always describe the windows of recent().
+        """
+        if len(timestamps):
+            if set(signals) != set(self._window_signals):
+                self._window_starts = self._window_starts[:0]
+                self._window_timestamps = self._window_timestamps[:0]
+                self._window_signals = {event_type: (np.zeros(0), np.zeros(0)) for event_type in signals}
+            starts = self.span_start + self.step * np.arange(len(timestamps))
+            self._window_starts = np.concatenate([self._window_starts, starts])
+            self._window_timestamps = np.concatenate([self._window_timestamps, timestamps])
+            for event_type, (signal, values) in signals.items():
+                old_signal, old_values = self._window_signals[event_type]
+                self._window_signals[event_type] = (np.concatenate([old_signal, signal]),
+                                                    np.concatenate([old_values, values]))
+
+        keep = self._window_starts >= self._count - len(self)
+        self._window_starts = self._window_starts[keep]
+        self._window_timestamps = self._window_timestamps[keep]
+        self._window_signals = {event_type: (signal[keep], values[keep])
+                                for event_type, (signal, values) in self._window_signals.items()}
+
+    def recent_window_signals(self) -> Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        """Timestamps and trigger signals of the completed windows inside recent()."""
+        return self._window_timestamps, self._window_signals
@@ -1,6 +1,11 @@
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 import numpy as np
-import pandas as pd
+
+from app.model.moments import RunningMoments
+from app.model.events import EventData, count_events, event_values
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class ScoringSystem:
     def __init__(self):
@@ -80,8 +85,25 @@ class ScoringSystem:
             return 'mild'
         return 'normal'
     
-    def _calculate_event_penalties(self, events: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
-        """Calculate penalties for each type of event."""
+    def _event_severity_penalties(self, event_type: str, values: np.ndarray) -> np.ndarray:
+        """Penalty of every event value of one type, by severity (vectorized _get_event_severity)."""
+        thresholds = self.thresholds[event_type]
+        penalties = self.penalties[event_type]
+        levels = ['severe', 'moderate', 'mild']
+        
+        # For braking (negative values)
+        if event_type == 'harsh_braking':
+            conditions = [values <= thresholds[level] for level in levels]
+        else:
+            conditions = [values >= thresholds[level] for level in levels]
+        
+        return np.select(conditions, [penalties[level] for level in levels], default=0)
+    
+    def _calculate_event_penalties(self, events: EventData) -> Dict[str, float]:
+        """Calculate penalties for each type of event.
+        
+        events may be a structured event array or per-type event lists.
+        """
         penalties = {
             'acceleration': 0,
             'braking': 0,
@@ -91,38 +113,38 @@ class ScoringSystem:
         }
         
         # Process harsh acceleration events
-        for event in events.get('harsh_acceleration', []):
-            severity = self._get_event_severity('harsh_acceleration', event['value'])
-            if severity in self.penalties['harsh_acceleration']:
-                penalties['acceleration'] += self.penalties['harsh_acceleration'][severity]
+        values = event_values(events, 'harsh_acceleration')
+        penalties['acceleration'] = int(self._event_severity_penalties('harsh_acceleration', values).sum())
         
         # Process harsh braking events
-        for event in events.get('harsh_braking', []):
-            severity = self._get_event_severity('harsh_braking', event['value'])
-            if severity in self.penalties['harsh_braking']:
-                penalties['braking'] += self.penalties['harsh_braking'][severity]
+        values = event_values(events, 'harsh_braking')
+        penalties['braking'] = int(self._event_severity_penalties('harsh_braking', values).sum())
         
         # Process harsh cornering events
-        for event in events.get('harsh_cornering', []):
-            severity = self._get_event_severity('harsh_cornering', abs(event['value']))
-            if severity in self.penalties['harsh_cornering']:
-                penalties['cornering'] += self.penalties['harsh_cornering'][severity]
+        values = np.abs(event_values(events, 'harsh_cornering'))
+        penalties['cornering'] = int(self._event_severity_penalties('harsh_cornering', values).sum())
         
         # Process phone usage events
-        penalties['phone_usage'] = len(events.get('phone_usage', [])) * self.penalties['phone_usage']
+        penalties['phone_usage'] = count_events(events, 'phone_usage') * self.penalties['phone_usage']
         
         # Process speeding events
-        penalties['speeding'] = len(events.get('speeding', [])) * self.penalties['speeding']
+        penalties['speeding'] = count_events(events, 'speeding') * self.penalties['speeding']
         
         return penalties
     
-    def _calculate_consistency_score(self, data: pd.DataFrame) -> float:
-        """Calculate a score for driving consistency."""
-        if 'AccX' not in data.columns or 'AccY' not in data.columns or 'AccZ' not in data.columns:
-            return 50.0  # Default if data is missing
+    def _calculate_consistency_score(self, data: 'pd.DataFrame', moments: Optional[RunningMoments] = None) -> float:
+        """Calculate a score for driving consistency.
+        
+        A RunningMoments accumulator over (AccX, AccY, AccZ) can be passed to
+        reuse moments that were already accumulated, e.g. while a trip streams in.
+        """
+        if moments is None:
+            if 'AccX' not in data.columns or 'AccY' not in data.columns or 'AccZ' not in data.columns:
+                return 50.0  # Default if data is missing
+            moments = RunningMoments.from_values(data[['AccX', 'AccY', 'AccZ']].to_numpy())
         
         # Calculate standard deviation of acceleration
-        acc_std = np.mean([np.std(data['AccX']), np.std(data['AccY']), np.std(data['AccZ'])])
+        acc_std = np.mean(moments.std)
         
         # Lower std deviation means more consistent driving
         # Use an exponential function to map std deviation to a score between 0 and 100
@@ -130,7 +152,7 @@ class ScoringSystem:
         
         return min(100, max(0, consistency_score))
     
-    def calculate_trip_scores(self, data: pd.DataFrame, events: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+    def calculate_trip_scores(self, data: 'pd.DataFrame', events: EventData) -> Dict[str, float]:
         """Calculate comprehensive scores for a completed trip."""
         # Base score for each category
         base_score = 100.0
@@ -169,7 +191,7 @@ class ScoringSystem:
         
         return scores
     
-    def calculate_realtime_score(self, data_chunk: pd.DataFrame, events_chunk: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+    def calculate_realtime_score(self, data_chunk: 'pd.DataFrame', events_chunk: EventData) -> Dict[str, float]:
         """Calculate a preliminary score for a chunk of real-time data."""
         # Use the same algorithm as for trip scores, but with potentially less data
         return self.calculate_trip_scores(data_chunk, events_chunk)
@@ -0,0 +1,142 @@
+import numpy as np
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+
+from app.model.feature_plan import SENSOR_COLUMNS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class SensorBatch:
+    """Columnar batch of motion samples.
+
+    Holds the six sensor axes as one contiguous (sample x axis) float32 array
+    and the timestamps as an int64 array, i.e. 32 bytes per sample. Slicing
+    returns a view that shares memory with its parent; appending grows the
+    buffer with amortized doubling, so repeated appends do not copy the
+    samples already held.
+    """
+
+    __slots__ = ('_values', '_timestamps', '_size', '_owns_buffer')
+
+    columns = SENSOR_COLUMNS + ['Timestamp']
+
+    def __init__(self, values: np.ndarray = None, timestamps: np.ndarray = None, copy: bool = False):
+        """Create a batch from a (sample x 6) value array and a timestamp array."""
+        if values is None:
+            values = np.empty((0, len(SENSOR_COLUMNS)), dtype=np.float32)
+        if timestamps is None:
+            timestamps = np.zeros(len(values), dtype=np.int64)
+
+        values = np.array(values, dtype=np.float32, copy=copy or None, order='C')
+        timestamps = np.array(timestamps, dtype=np.int64, copy=copy or None)
+        if values.ndim != 2 or values.shape[1] != len(SENSOR_COLUMNS):
+            raise ValueError(f"values must have shape (n, {len(SENSOR_COLUMNS)})")
+        if len(timestamps) != len(values):
+            raise ValueError("values and timestamps must have the same length")
+
+        self._values = values
+        self._timestamps = timestamps
+        self._size = len(values)
+        self._owns_buffer = copy
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'SensorBatch':
+        """Build a batch from sample dicts, ignoring any keys besides the sensor columns."""
+        records = list(records)
+        values = np.array([[record[col] for col in SENSOR_COLUMNS] for record in records],
+                          dtype=np.float32).reshape(len(records), len(SENSOR_COLUMNS))
+        timestamps = np.array([record['Timestamp'] for record in records], dtype=np.int64)
+        return cls(values, timestamps)
+
+    @classmethod
+    def from_frame(cls, data: 'pd.DataFrame') -> 'SensorBatch':
+        """Build a batch from a DataFrame with the sensor and Timestamp columns."""
+        return cls(data[SENSOR_COLUMNS].to_numpy(dtype=np.float32), data['Timestamp'].to_numpy(dtype=np.int64))
+
+    @classmethod
+    def concatenate(cls, batches: Iterable['SensorBatch']) -> 'SensorBatch':
+        """Join batches in order; a single non-empty batch is returned as is."""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(np.concatenate([batch.values for batch in batches]),
+                   np.concatenate([batch.timestamps for batch in batches]))
+
+    @property
+    def values(self) -> np.ndarray:
+        """(sample x axis) float32 view of the sensor readings."""
+        return self._values[:self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """int64 view of the sample timestamps."""
+        return self._timestamps[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the samples in the batch."""
+        return self.values.nbytes + self.timestamps.nbytes
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index) -> 'SensorBatch':
+        """Slice the batch; basic slices are views that share memory."""
+        if not isinstance(index, slice):
+            index = np.asarray(index)
+        return SensorBatch(self.values[index], self.timestamps[index])
+
+    def column(self, name: str) -> np.ndarray:
+        """Return one column (sensor axis or Timestamp) as an array view."""
+        if name == 'Timestamp':
+            return self.timestamps
+        return self.values[:, SENSOR_COLUMNS.index(name)]
+
+    def _reserve(self, capacity: int):
+        """Ensure room for capacity samples in a buffer owned by this batch."""
+        if self._owns_buffer and capacity <= len(self._values):
+            return
+
+        new_capacity = max(capacity, 2 * len(self._values), 16)
+        values = np.empty((new_capacity, len(SENSOR_COLUMNS)), dtype=np.float32)
+        timestamps = np.empty(new_capacity, dtype=np.int64)
+        values[:self._size] = self.values
+        timestamps[:self._size] = self.timestamps
+
+        self._values, self._timestamps = values, timestamps
+        self._owns_buffer = True
+
+    def append(self, other) -> 'SensorBatch':
+        """Append another batch or a list of sample dicts in place and return self."""
+        if not isinstance(other, SensorBatch):
+            other = SensorBatch.from_records(other)
+
+        end = self._size + len(other)
+        self._reserve(end)
+        self._values[self._size:end] = other.values
+        self._timestamps[self._size:end] = other.timestamps
+        self._size = end
+        return self
+
+    def sort_by_timestamp(self) -> 'SensorBatch':
+        """Return the batch ordered by timestamp (itself if already ordered)."""
+        timestamps = self.timestamps
+        if len(timestamps) < 2 or np.all(timestamps[1:] >= timestamps[:-1]):
+            return self
+        order = np.argsort(timestamps, kind='stable')
+        return SensorBatch(self.values[order], timestamps[order])
+
+    def to_frame(self) -> 'pd.DataFrame':
+        """Return the samples as a DataFrame."""
+        import pandas as pd
+
+        frame = pd.DataFrame(self.values.astype(np.float64), columns=SENSOR_COLUMNS)
+        frame['Timestamp'] = self.timestamps
+        return frame
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Return the samples as a list of dicts, for JSON responses."""
+        return [dict(zip(SENSOR_COLUMNS, row), Timestamp=timestamp)
+                for row, timestamp in zip(self.values.tolist(), self.timestamps.tolist())]
@@ -0,0 +1,90 @@
+import argparse
+import copy
+import os
+import numpy as np
+from typing import Any, Optional
+
+from app.model.flat_forest import FlatForest
+
+def serving_model_path(model_path: str) -> str:
+    """Path of the serving artifact exported for a trained model."""
+    return os.path.join(os.path.dirname(model_path), 'serving_model.pkl')
+
+def flat_bundle_path(model_path: str) -> str:
+    """Path of the memory-mappable FlatForest bundle exported for a trained model."""
+    return os.path.join(os.path.dirname(model_path), 'serving_model_flat')
+
+def scaler_path(model_path: str) -> str:
+    """Path of the feature scaler saved with a trained model."""
+    return os.path.join(os.path.dirname(model_path), 'scaler.pkl')
+
+def fold_scaler(model: Any, scaler: Any) -> Optional[Any]:
+    """Return a copy of a tree model that reads unscaled features.
+    
+    A split x_scaled <= t on a StandardScaler output is the split
+    x <= t * scale + mean on the raw feature, so every threshold is mapped
+    back through the scaler and the trees no longer need the transform.
+    Returns None for models without decision trees.
+    """
+    estimators = getattr(model, 'estimators_', [model])
+    if not all(hasattr(estimator, 'tree_') for estimator in np.ravel(estimators)):
+        return None
+    
+    n_features = model.n_features_in_
+    mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+    
+    folded = copy.deepcopy(model)
+    for estimator in np.ravel(getattr(folded, 'estimators_', [folded])):
+        state = estimator.tree_.__getstate__()
+        nodes = state['nodes'].copy()
+        split = nodes['left_child'] >= 0
+        features = nodes['feature'][split]
+        nodes['threshold'][split] = nodes['threshold'][split] * scale[features] + mean[features]
+        state['nodes'] = nodes
+        estimator.tree_.__setstate__(state)
+    return folded
+
+def export_serving_model(model: Any, scaler: Any, model_path: str) -> Optional[str]:
+    """Save model with scaler folded in next to model_path and return its path.
+    
+    Without a scaler the model is saved as is. Tree ensembles are also saved
+    as a memory-mappable FlatForest bundle. Returns None if the scaler
+    cannot be folded into the model.
+    """
+    import joblib
+    
+    serving_model = model if scaler is None else fold_scaler(model, scaler)
+    if serving_model is None:
+        return None
+    
+    path = serving_model_path(model_path)
+    joblib.dump(serving_model, path)
+    
+    flat_model = FlatForest.from_model(serving_model)
+    if flat_model is not None:
+        flat_model.save(flat_bundle_path(model_path))
+    return path
+
+def main():
+    """Export the serving artifacts of an already trained model."""
+    import joblib
+    
+    parser = argparse.ArgumentParser(description='Export serving artifacts of a trained model')
+    parser.add_argument('--model', default='app/model/trained_models/driver_model.pkl', help='Path to the trained model')
+    
+    args = parser.parse_args()
+    
+    model = joblib.load(args.model)
+    scaler = joblib.load(scaler_path(args.model)) if os.path.exists(scaler_path(args.model)) else None
+    path = export_serving_model(model, scaler, args.model)
+    if path is None:
+        print("Error: the scaler cannot be folded into this model")
+        return
+    
+    print(f"Serving model saved to {path}")
+    if os.path.isdir(flat_bundle_path(args.model)):
+        print(f"Memory-mappable bundle saved to {flat_bundle_path(args.model)}")
+
+if __name__ == '__main__':
+    main()
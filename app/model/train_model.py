@@ -10,6 +10,9 @@ def main():
     parser.add_argument('--train', required=True, help='Path to training data CSV file')
     parser.add_argument('--test', help='Path to test data CSV file for evaluation')
     parser.add_argument('--output', default='app/model/trained_models/driver_model.pkl', help='Path to save the trained model')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for feature extraction')
+    parser.add_argument('--chunk-rows', type=int, help='Stream CSV files in chunks of this many rows instead of loading them whole')
+    parser.add_argument('--no-feature-cache', action='store_true', help='Always re-extract features instead of using the feature cache')
     
     args = parser.parse_args()
     
@@ -17,11 +20,11 @@ def main():
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
     
     # Initialize model
-    model = DriverBehaviorModel(model_path=args.output)
+    model = DriverBehaviorModel(model_path=args.output, use_feature_cache=not args.no_feature_cache)
     
     # Train model
     print(f"Training model using data from {args.train}...")
-    result = model.train(args.train)
+    result = model.train(args.train, workers=args.workers, chunk_rows=args.chunk_rows)
     
     if 'error' in result:
         print(f"Error training model: {result['error']}")
@@ -33,7 +36,7 @@ def main():
     # Evaluate model if test data is provided
     if args.test:
         print(f"\nEvaluating model using data from {args.test}...")
-        eval_result = model.evaluate(args.test)
+        eval_result = model.evaluate(args.test, workers=args.workers, chunk_rows=args.chunk_rows)
         
         if 'error' in eval_result:
             print(f"Error evaluating model: {eval_result['error']}")
@@ -0,0 +1,110 @@
+import copy
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+
+from app.model.events import EVENT_TYPES, count_events
+from app.model.feature_plan import SENSOR_COLUMNS
+from app.model.moments import RunningMoments
+from app.model.sensor_batch import SensorBatch
+
+# Columns of the acceleration axes in SensorBatch values
+ACC_INDEX = [SENSOR_COLUMNS.index(col) for col in ['AccX', 'AccY', 'AccZ']]
+
+class TripAggregates:
+    """Running totals of a live trip, updated as its samples are ingested.
+
+    Holds what the scores and statistics of a whole-trip analysis read: the
+    sample count and time span, (AccX, AccY, AccZ) moments, event counts by
+    type and predicted behavior counts. Samples are added after the same
+    preprocessing as the whole trip, and events and labels per completed
+    window, so a provisional analysis of the trip so far is O(1) instead of
+    re-analysing every sample.
+
+    Like the WindowCache, the totals only hold while the samples are final:
+    once samples arrive out of timestamp order or with missing values, the
+    whole-trip preprocessing may reorder or refill them and the aggregates
+    are invalidated for the rest of the trip.
+    """
+
+    def __init__(self):
+        """Create empty aggregates."""
+        self.valid = True
+        self.data_points = 0
+        self.windows = 0
+        self.first_timestamp: Optional[int] = None
+        self.last_timestamp: Optional[int] = None
+        self.acc_moments = RunningMoments(3)
+
+        # Closed events by type, plus the types with an event still open
+        self.event_counts: Dict[str, int] = {event_type: 0 for event_type in EVENT_TYPES}
+        self.open_event_types: List[str] = []
+
+        # Labels of every window, all predicted by one model version
+        self.behavior_counts: Dict[str, int] = {}
+        self.labelled_windows = 0
+        self.label_version: Optional[int] = None
+
+        self._lock = threading.Lock()
+
+    def add_samples(self, batch: SensorBatch):
+        """Add preprocessed samples that follow the ones already added."""
+        if not self.valid or len(batch) == 0:
+            return
+
+        with self._lock:
+            self.acc_moments.update(batch.values[:, ACC_INDEX])
+
+            # Valid samples arrive in timestamp order
+            if self.first_timestamp is None:
+                self.first_timestamp = int(batch.timestamps[0])
+            self.last_timestamp = int(batch.timestamps[-1])
+            self.data_points += len(batch)
+
+    def add_windows(self, n_windows: int, events: np.ndarray, open_event_types: List[str],
+                    labels=None, version: Optional[int] = None):
+        """Add the next n_windows windows: the events they closed and their predicted labels.
+
+        open_event_types are the types with an event still open after these
+        windows. labels may be None when no model was available; otherwise
+        version is the model version that predicted them.
+        """
+        if not self.valid:
+            return
+
+        with self._lock:
+            for event_type in EVENT_TYPES:
+                self.event_counts[event_type] += count_events(events, event_type)
+            self.open_event_types = list(open_event_types)
+
+            if labels is not None:
+                if version != self.label_version:
+                    # Labels of another model version cannot be mixed into the counts
+                    self.behavior_counts = {}
+                    self.labelled_windows = 0
+                    self.label_version = version
+                for label in labels:
+                    self.behavior_counts[label] = self.behavior_counts.get(label, 0) + 1
+                self.labelled_windows += len(labels)
+
+            self.windows += n_windows
+
+    def invalidate(self):
+        """Stop maintaining the aggregates for the rest of the trip."""
+        self.valid = False
+
+    def snapshot(self) -> 'TripAggregates':
+        """Return a consistent copy, safe to read while samples keep arriving."""
+        with self._lock:
+            snapshot = copy.copy(self)
+            snapshot.acc_moments = copy.copy(self.acc_moments)
+            snapshot.event_counts = dict(self.event_counts)
+            snapshot.behavior_counts = dict(self.behavior_counts)
+        return snapshot
+
+    def event_totals(self) -> Dict[str, int]:
+        """Events by type, counting every open event as it will be closed."""
+        totals = dict(self.event_counts)
+        for event_type in self.open_event_types:
+            totals[event_type] += 1
+        return totals
@@ -0,0 +1,106 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+class WindowCache:
+    """Per-trip store of analysed windows, keyed by trip-global window start.
+
+    Holds the feature rows, predicted labels (with the model version that
+    predicted them), timestamps and event trigger signals of the consecutive
+    windows a trip has completed so far, as the real-time path produces them, so that analysing the finished trip only
+    has to compute the windows that are missing. Results are appended in
+    blocks and joined on first read.
+
+    Windows are only reusable while the samples they cover are final. Once
+    samples arrive out of timestamp order or with missing values, the
+    whole-trip preprocessing may reorder or refill them, so the cache is
+    invalidated for the rest of the trip.
+    """
+
+    def __init__(self, window_size: int, step: int):
+        """Create an empty cache for windows of window_size samples, step samples apart."""
+        self.window_size = window_size
+        self.step = step
+        self.valid = True
+        self.feature_names: Optional[List[str]] = None
+        self._blocks: List[Dict[str, object]] = []
+        self._count = 0
+        self._joined = None
+
+    def __len__(self) -> int:
+        """Number of cached windows."""
+        return self._count
+
+    @property
+    def next_start(self) -> int:
+        """Trip-global start of the first window not cached yet."""
+        return self._count * self.step
+
+    def add(self, first_start: int, timestamps: np.ndarray, feature_names: List[str], features: np.ndarray,
+            labels: np.ndarray, signals: Dict[str, Tuple[np.ndarray, np.ndarray]], version: Optional[int] = None):
+        """Store the results of consecutive windows, the first starting at first_start.
+
+        version is the model version that predicted labels, or None if no
+        model was available.
+        """
+        if not self.valid or len(timestamps) == 0:
+            return
+
+        # Only a gap-free run of windows from the trip start can be looked up by index
+        if first_start != self.next_start or (self.feature_names is not None and feature_names != self.feature_names):
+            self.invalidate()
+            return
+
+        self.feature_names = list(feature_names)
+        self._blocks.append({
+            'timestamps': np.asarray(timestamps),
+            'features': np.asarray(features, dtype=np.float64),
+            'labels': np.asarray(labels, dtype=object),
+            'versions': np.full(len(timestamps), version, dtype=object),
+            'signals': signals
+        })
+        self._count += len(timestamps)
+        self._joined = None
+
+    def invalidate(self):
+        """Drop every cached window and stop caching for the rest of the trip."""
+        self.valid = False
+        self.feature_names = None
+        self._blocks = []
+        self._count = 0
+        self._joined = None
+
+    def covers(self, starts: np.ndarray) -> np.ndarray:
+        """Boolean mask of the window starts whose results are cached."""
+        starts = np.asarray(starts)
+        return (starts % self.step == 0) & (starts < self.next_start)
+
+    def rows(self, starts: np.ndarray) -> Dict[str, object]:
+        """Return the cached timestamps, features, labels, label versions and signals of covered starts."""
+        joined = self._join()
+        index = np.asarray(starts, dtype=np.int64) // self.step
+        return {
+            'timestamps': joined['timestamps'][index],
+            'features': joined['features'][index],
+            'labels': joined['labels'][index],
+            'versions': joined['versions'][index],
+            'signals': {event_type: (signal[index], values[index])
+                        for event_type, (signal, values) in joined['signals'].items()}
+        }
+
+    def _join(self) -> Dict[str, object]:
+        """Concatenate the stored blocks into single arrays."""
+        if self._joined is None:
+            signal_types = [event_type for event_type in self._blocks[0]['signals']
+                            if all(event_type in block['signals'] for block in self._blocks)]
+            self._joined = {
+                'timestamps': np.concatenate([block['timestamps'] for block in self._blocks]),
+                'features': np.concatenate([block['features'] for block in self._blocks]),
+                'labels': np.concatenate([block['labels'] for block in self._blocks]),
+                'versions': np.concatenate([block['versions'] for block in self._blocks]),
+                'signals': {event_type: tuple(np.concatenate([block['signals'][event_type][i] for block in self._blocks])
+                                              for i in range(2))
+                            for event_type in signal_types}
+            }
+            # Keep a single block so later appends only join the new ones
+            self._blocks = [self._joined]
+        return self._joined
@@ -0,0 +1,112 @@
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict
+
+from app.model.data_processor import DataProcessor
+from app.model.sensor_batch import SensorBatch
+
+def time_call(func: Callable, repeats: int) -> Dict[str, float]:
+    """Call func repeatedly and return latency statistics in milliseconds."""
+    func()  # Warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    return {
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95))
+    }
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    """Print one line of latency statistics per benchmarked variant."""
+    baseline = next(iter(results.values()))['mean_ms']
+    for name, stats in results.items():
+        print(f"  {name:<24} mean {stats['mean_ms']:8.3f} ms   p50 {stats['p50_ms']:8.3f} ms   "
+              f"p95 {stats['p95_ms']:8.3f} ms   speedup {baseline / stats['mean_ms']:5.1f}x")
+
+def benchmark_realtime(csv_path: str, rows: int, repeats: int, with_model: bool = True) -> Dict[str, Dict[str, float]]:
+    """Per-call latency of process_realtime_data on a chunk, pandas path vs NumPy path."""
+    data = pd.read_csv(csv_path).drop(columns=['Class'], errors='ignore').iloc[:rows]
+    processor = DataProcessor() if with_model else DataProcessor(model_path='')
+
+    def pandas_path():
+        processor.fast_path_max_rows = 0
+        processor.process_realtime_data(data)
+
+    def numpy_path():
+        processor.fast_path_max_rows = rows
+        processor.process_realtime_data(data)
+
+    batch = SensorBatch.from_frame(data)
+
+    def numpy_path_batch():
+        processor.fast_path_max_rows = rows
+        processor.process_realtime_data(batch)
+
+    return {
+        'pandas (DataFrame)': time_call(pandas_path, repeats),
+        'numpy (DataFrame)': time_call(numpy_path, repeats),
+        'numpy (SensorBatch)': time_call(numpy_path_batch, repeats)
+    }
+
+def benchmark_predict(csv_path: str, rows: int, repeats: int) -> Dict[str, Dict[str, float]]:
+    """Per-call latency of predicting rows feature windows, sklearn vs the flattened forest."""
+    processor = DataProcessor()
+    if processor.flat_model is None:
+        raise ValueError("The bundled model cannot be flattened")
+    data = processor.preprocess_data(pd.read_csv(csv_path).drop(columns=['Class'], errors='ignore'))
+    features = processor.extract_features(data).drop(columns=['Timestamp'], errors='ignore')
+    X = features.to_numpy(dtype=np.float64)[:rows]
+    
+    sklearn_labels = processor.model.predict(X)
+    if not np.array_equal(sklearn_labels, processor.flat_model.predict(X)):
+        raise AssertionError("Flattened forest predictions differ from sklearn")
+    
+    return {
+        'sklearn predict': time_call(lambda: processor.model.predict(X), repeats),
+        'flat forest predict': time_call(lambda: processor.flat_model.predict(X), repeats)
+    }
+
+def benchmark_plan(csv_path: str, repeats: int) -> Dict[str, object]:
+    """Extraction time of the model's feature plan against the full plan on a whole CSV file."""
+    processor = DataProcessor()
+    data = processor.preprocess_data(pd.read_csv(csv_path).drop(columns=['Class'], errors='ignore'))
+    return processor.feature_plan.measure_savings(processor, data, repeats)
+
+def main():
+    """Run micro-benchmarks of the analysis hot paths."""
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for the driver behavior pipeline')
+    parser.add_argument('benchmark', choices=['realtime', 'predict', 'plan'], help='Benchmark to run')
+    parser.add_argument('--csv', default='data/test_motion_data.csv', help='Path to motion data CSV file')
+    parser.add_argument('--rows', type=int, default=100, help='Rows per real-time chunk, or feature windows per prediction')
+    parser.add_argument('--repeats', type=int, default=200, help='Timed calls per variant (extractions per plan for plan)')
+    parser.add_argument('--no-model', action='store_true', help='Leave out model inference to time the pipeline alone')
+
+    args = parser.parse_args()
+
+    # pandas' fillna(method=...) deprecation warnings would flood the output
+    warnings.simplefilter('ignore', FutureWarning)
+
+    if args.benchmark == 'realtime':
+        print(f"process_realtime_data latency, {args.rows}-row chunk, {args.repeats} calls:")
+        print_results(benchmark_realtime(args.csv, args.rows, args.repeats, with_model=not args.no_model))
+    elif args.benchmark == 'predict':
+        print(f"Model prediction latency, {args.rows}-window batch, {args.repeats} calls:")
+        print_results(benchmark_predict(args.csv, args.rows, args.repeats))
+    elif args.benchmark == 'plan':
+        savings = benchmark_plan(args.csv, args.repeats)
+        print(f"Feature plan of the model, best of {args.repeats} extractions of {args.csv}:")
+        print(f"  features planned  {savings['features_planned']} of {savings['features_total']}")
+        print(f"  skipped families  {', '.join(savings['skipped_families']) or 'none'}")
+        print(f"  full plan         {savings['full_seconds'] * 1000:8.3f} ms")
+        print(f"  model plan        {savings['plan_seconds'] * 1000:8.3f} ms   "
+              f"saved {savings['saved_fraction']:.0%}")
+
+if __name__ == '__main__':
+    main()
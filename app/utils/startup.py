@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+
+from app.model.feature_plan import SENSOR_COLUMNS
+from app.model.sensor_batch import SensorBatch
+
+# Statement whose imports the import-time report measures
+APP_STARTUP_STATEMENT = "from app import create_app; create_app({'WARM_UP': False})"
+
+def warm_up(data_processor) -> Dict[str, float]:
+    """Load the model and run one dummy analysis, so the first request doesn't pay for either.
+
+    Returns the time each step took in milliseconds.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    handle = data_processor.model_handle
+    timings['model_load_ms'] = (time.perf_counter() - start) * 1000
+
+    # Two windows of quiet driving go through features, events, scores and prediction
+    n_samples = 2 * data_processor.window_size
+    rng = np.random.default_rng(0)
+    batch = SensorBatch(rng.normal(0.0, 0.05, (n_samples, len(SENSOR_COLUMNS))), np.arange(n_samples) * 20)
+
+    start = time.perf_counter()
+    data_processor.process_realtime_data(batch)
+    timings['dummy_prediction_ms'] = (time.perf_counter() - start) * 1000
+    timings['model_version'] = handle.version
+    return timings
+
+def start_warm_up(data_processor) -> threading.Thread:
+    """Run warm_up on a background thread and return the thread."""
+    def run():
+        try:
+            timings = warm_up(data_processor)
+            print(f"Warm-up done: model loaded in {timings['model_load_ms']:.0f} ms, "
+                  f"first prediction in {timings['dummy_prediction_ms']:.0f} ms")
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def import_time_report(statement: str = APP_STARTUP_STATEMENT, top: int = 25) -> List[Tuple[str, float, float]]:
+    """Run statement in a fresh interpreter under -X importtime.
+
+    Returns the top modules by cumulative import time as (module,
+    self ms, cumulative ms) tuples.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line
+        entries.append((fields[2].strip(), int(fields[0]) / 1000, int(fields[1]) / 1000))
+
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else "Import failed")
+    return sorted(entries, key=lambda entry: entry[2], reverse=True)[:top]
+
+def print_import_report(entries: List[Tuple[str, float, float]]):
+    """Print one line per module of an import-time report."""
+    print(f"  {'cumulative ms':>13}  {'self ms':>8}  module")
+    for module, self_ms, cumulative_ms in entries:
+        print(f"  {cumulative_ms:13.1f}  {self_ms:8.1f}  {module}")
@@ -1,8 +1,29 @@
-from app import create_app, socketio
+import argparse
 import os
 
-app = create_app()
+def __getattr__(name: str):
+    """Build the app on first access to run.app, for WSGI servers (gunicorn run:app, flask --app run)."""
+    if name == 'app':
+        from app import create_app
+        
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    socketio.run(app, host='0.0.0.0', port=port)
+    parser = argparse.ArgumentParser(description='Run the driver behavior analytics server')
+    parser.add_argument('--importtime', action='store_true', help='Print the slowest imports of create_app and exit')
+    
+    args = parser.parse_args()
+    
+    if args.importtime:
+        # Measured in a fresh interpreter; the app is not built here
+        from app.utils.startup import import_time_report, print_import_report
+        print("Slowest imports of create_app (python -X importtime):")
+        print_import_report(import_time_report())
+    else:
+        from app import create_app, socketio
+        
+        app = create_app()
+        port = int(os.environ.get('PORT', 5000))
+        socketio.run(app, host='0.0.0.0', port=port)